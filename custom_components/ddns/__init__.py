@@ -1,18 +1,65 @@
 """DDNS of the Home Assistant instance."""
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from __future__ import annotations
 
-from .const import PLATFORMS
+from typing import TYPE_CHECKING
+
+from .const import (
+    CONF_DOMAIN_NAME,
+    CONF_DOMAIN_RR,
+    DATA_CHANNELS,
+    DNS_TYPE,
+    DOMAIN,
+    PLATFORMS,
+)
+from .history import async_remove_history, history_key
+
+if TYPE_CHECKING:
+    # Kept out of the runtime imports so the standalone daemon can import
+    # this package without Home Assistant installed.
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up ddns from a config entry."""
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    # Imported here so the daemon can import this package without Home
+    # Assistant installed.
+    from homeassistant.config_entries import ConfigEntryState
+
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok and not any(
+        other.state is ConfigEntryState.LOADED
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        # The last entry is gone, close the shared discovery connections.
+        for channel in hass.data.get(DOMAIN, {}).pop(DATA_CHANNELS, {}).values():
+            channel.cancel()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the ip change history of a deleted entry."""
+    # Keyed like the sensor, not by entry.unique_id which may differ.
+    await async_remove_history(
+        hass,
+        history_key(
+            entry.data[CONF_DOMAIN_RR],
+            entry.data[CONF_DOMAIN_NAME],
+            entry.data[DNS_TYPE],
+        ),
+    )
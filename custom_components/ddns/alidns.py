@@ -4,16 +4,33 @@ import asyncio
 from functools import partial
 import logging
 import sys
-from typing import Optional
+from typing import Any, Optional
 
 from alibabacloud_alidns20150109 import models as alidns_20150109_models
 from alibabacloud_alidns20150109.client import Client
 from alibabacloud_tea_openapi import models as open_api_models
 from alibabacloud_tea_util import models as util_models
+from Tea.exceptions import TeaException
+
+from .const import (
+    ALI_ENDPOINT,
+    CONF_ALI_ACCESS_KEY_ID,
+    CONF_ALI_ACCESS_KEY_SECRET,
+    CONF_ENDPOINTS,
+    CONF_HEDGE,
+    PROVIDER_MAX_CONCURRENCY,
+)
+from .endpoints import EndpointPool
+from .reconcile import ActualRecord, PlanOp
 
 logging.basicConfig(level=logging.INFO)
 
 
+def is_endpoint_error(err: Exception) -> bool:
+    """Return True if err means the endpoint could not be reached."""
+    return not isinstance(err, TeaException)
+
+
 class AlidnsClient(Client):
     """ali dns."""
 
@@ -64,3 +81,104 @@ class AlidnsClient(Client):
             None,
             partial(self.update_domain_record_with_options, request, runtime),
         )
+
+    async def delete_domain_record_async(
+        self,
+        request: alidns_20150109_models.DeleteDomainRecordRequest,
+    ) -> alidns_20150109_models.DeleteDomainRecordResponse:
+        runtime = util_models.RuntimeOptions()
+        return await self.loop.run_in_executor(
+            None,
+            partial(self.delete_domain_record_with_options, request, runtime),
+        )
+
+
+class AliProvider:
+    """ali dns record operations."""
+
+    max_concurrency = PROVIDER_MAX_CONCURRENCY
+
+    def __init__(
+        self,
+        access_key_id: str,
+        access_key_secret: str,
+        endpoints: Optional[list[str]] = None,
+        hedge: bool = False,
+        client: Optional[AlidnsClient] = None,
+    ) -> None:
+        if client is None:
+            clients = {}
+            for endpoint in endpoints or [ALI_ENDPOINT]:
+                config = open_api_models.Config(
+                    access_key_id=access_key_id, access_key_secret=access_key_secret
+                )
+                config.endpoint = endpoint
+                clients[endpoint] = AlidnsClient(config)
+        else:
+            clients = {ALI_ENDPOINT: client}
+        self.pool = EndpointPool(clients, is_endpoint_error)
+        self.hedge = hedge
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "AliProvider":
+        return cls(
+            config[CONF_ALI_ACCESS_KEY_ID],
+            config[CONF_ALI_ACCESS_KEY_SECRET],
+            endpoints=config.get(CONF_ENDPOINTS),
+            hedge=config.get(CONF_HEDGE, False),
+        )
+
+    async def async_list_records(
+        self, domain_name: str, rr: str, record_type: str
+    ) -> list[ActualRecord]:
+        request = alidns_20150109_models.DescribeSubDomainRecordsRequest()
+        request.domain_name = domain_name
+        request.sub_domain = rr + "." + domain_name
+        request.type = record_type
+        request.line = "default"
+        records = await self.pool.async_read(
+            lambda client: client.describe_sub_domain_records_async(request),
+            hedge=self.hedge,
+        )
+        body = records.body
+        if not body.total_count:
+            return []
+        return [
+            ActualRecord(
+                record_id=record.record_id,
+                rr=record.rr,
+                type=record.type,
+                value=record.value,
+                ttl=record.ttl,
+            )
+            for record in body.domain_records.record
+        ]
+
+    async def async_create_record(self, domain_name: str, op: PlanOp) -> None:
+        request = alidns_20150109_models.AddDomainRecordRequest()
+        request.domain_name = domain_name
+        request.rr = op.rr
+        request.type = op.type
+        request.value = op.value
+        request.ttl = op.ttl
+        await self.pool.async_write(
+            lambda client: client.add_domain_record_async(request)
+        )
+
+    async def async_update_record(self, domain_name: str, op: PlanOp) -> None:
+        request = alidns_20150109_models.UpdateDomainRecordRequest()
+        request.record_id = op.record_id
+        request.rr = op.rr
+        request.type = op.type
+        request.value = op.value
+        request.ttl = op.ttl
+        await self.pool.async_write(
+            lambda client: client.update_domain_record_async(request)
+        )
+
+    async def async_delete_record(self, domain_name: str, op: PlanOp) -> None:
+        request = alidns_20150109_models.DeleteDomainRecordRequest()
+        request.record_id = op.record_id
+        await self.pool.async_write(
+            lambda client: client.delete_domain_record_async(request)
+        )
@@ -17,11 +17,18 @@ from tencentcloud.common.exception.tencent_cloud_sdk_exception import (
 from tencentcloud.dnspod.v20210323 import models as tencent_models
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.core import callback
 from homeassistant.helpers import selector
 
-from .alidns import AlidnsClient
+from .alidns import AlidnsClient, is_endpoint_error as ali_is_endpoint_error
 from .const import (
+    ALI_ENDPOINT,
     CONF_ALI_ACCESS_KEY_ID,
     CONF_ALI_ACCESS_KEY_SECRET,
     CONF_DNS_SERVER,
@@ -29,8 +36,13 @@ from .const import (
     CONF_DNS_SERVER_TENCENT,
     CONF_DOMAIN_NAME,
     CONF_DOMAIN_RR,
+    CONF_ENDPOINTS,
+    CONF_HEDGE,
+    CONF_PRECHECK,
     CONF_TENCENT_SECRET_ID,
+    CONF_TEMPLATES,
     CONF_TENCENT_SECRET_KEY,
+    CONF_TRANSPORT,
     DNS_HOSTNAME,
     DNS_IPV4_TYPE,
     DNS_IPV6_TYPE,
@@ -39,8 +51,16 @@ from .const import (
     DNS_RESOLVER_IPV6,
     DNS_TYPE,
     DOMAIN,
+    TEMPLATE_PLACEHOLDER,
+    TENCENT_ENDPOINT,
+    TRANSPORT_TLS,
+    TRANSPORT_UDP,
+)
+from .core import parse_template
+from .tencentdns import (
+    TencentdnsClient,
+    is_endpoint_error as tencent_is_endpoint_error,
 )
-from .tencentdns import TencentdnsClient
 
 data_schema_dns_server = vol.Schema(
     {
@@ -73,6 +93,9 @@ data_schema_ali_access = vol.Schema(
         ),
         vol.Required(CONF_DOMAIN_RR): str,
         vol.Required(CONF_DOMAIN_NAME): str,
+        vol.Optional(CONF_ENDPOINTS, default=[]): selector.TextSelector(
+            selector.TextSelectorConfig(multiple=True)
+        ),
     }
 )
 
@@ -91,12 +114,42 @@ data_schema_tencent_access = vol.Schema(
         ),
         vol.Required(CONF_DOMAIN_RR): str,
         vol.Required(CONF_DOMAIN_NAME): str,
+        vol.Optional(CONF_ENDPOINTS, default=[]): selector.TextSelector(
+            selector.TextSelectorConfig(multiple=True)
+        ),
+    }
+)
+
+data_schema_options = vol.Schema(
+    {
+        vol.Optional(CONF_PRECHECK, default=False): bool,
+        vol.Optional(CONF_ENDPOINTS, default=[]): selector.TextSelector(
+            selector.TextSelectorConfig(multiple=True)
+        ),
+        vol.Optional(CONF_HEDGE, default=False): bool,
+        vol.Optional(CONF_TRANSPORT, default=TRANSPORT_UDP): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=[
+                    TRANSPORT_UDP,
+                    TRANSPORT_TLS,
+                ],
+                translation_key=CONF_TRANSPORT,
+            ),
+        ),
+        vol.Optional(CONF_TEMPLATES, default=[]): selector.TextSelector(
+            selector.TextSelectorConfig(multiple=True)
+        ),
     }
 )
 
 
 async def async_validate_ali(
-    access_key_id: str, access_key_secret: str, dns_type: str, rr: str, domain_name: str
+    access_key_id: str,
+    access_key_secret: str,
+    dns_type: str,
+    rr: str,
+    domain_name: str,
+    endpoints: list[str] | None = None,
 ) -> str:
     """Validate ali."""
 
@@ -123,22 +176,27 @@ async def async_validate_ali(
         rr: str,
         domain_name: str,
     ) -> str:
-        """Return error code."""
-
-        try:
-            config = open_api_models.Config(
-                access_key_id=access_key_id, access_key_secret=access_key_secret
-            )
-            config.endpoint = "alidns.cn-hangzhou.aliyuncs.com"
-            client = AlidnsClient(config)
-            request = alidns_models.DescribeSubDomainRecordsRequest()
-            request.sub_domain = rr + "." + domain_name
-            request.type = dns_type.upper()
-            await client.describe_sub_domain_records_async(request)
-        except TeaException as e:
-            return e.code
-        except Exception:  # noqa: BLE001
-            return "invalid_params"
+        """Return error code, trying each endpoint until one answers."""
+
+        for endpoint in endpoints or [ALI_ENDPOINT]:
+            try:
+                config = open_api_models.Config(
+                    access_key_id=access_key_id, access_key_secret=access_key_secret
+                )
+                config.endpoint = endpoint
+                client = AlidnsClient(config)
+                request = alidns_models.DescribeSubDomainRecordsRequest()
+                request.sub_domain = rr + "." + domain_name
+                request.type = dns_type.upper()
+                await client.describe_sub_domain_records_async(request)
+            except TeaException as e:
+                return e.code
+            except Exception as e:  # noqa: BLE001
+                if not ali_is_endpoint_error(e):
+                    return "invalid_params"
+                continue
+            return None
+        return "cannot_connect"
 
     tasks = await asyncio.gather(
         async_check_dns_type(dns_type),
@@ -151,7 +209,12 @@ async def async_validate_ali(
 
 
 async def async_validate_tencent(
-    secret_id: str, secret_key: str, dns_type: str, rr: str, domain_name: str
+    secret_id: str,
+    secret_key: str,
+    dns_type: str,
+    rr: str,
+    domain_name: str,
+    endpoints: list[str] | None = None,
 ) -> str:
     """Validate ali."""
 
@@ -178,20 +241,25 @@ async def async_validate_tencent(
         rr: str,
         domain_name: str,
     ) -> str:
-        """Return error code."""
-
-        try:
-            client = TencentdnsClient(secret_id, secret_key)
-            req = tencent_models.DescribeRecordListRequest()
-            req.Domain = domain_name
-            req.Subdomain = rr
-            req.RecordType = dns_type.upper()
-            await client.describeRecordList(req)
-        except TencentCloudSDKException as e:
-            if e.code != "ResourceNotFound.NoDataOfRecord":
-                return e.code
-        except Exception:  # noqa: BLE001
-            return "invalid_params"
+        """Return error code, trying each endpoint until one answers."""
+
+        for endpoint in endpoints or [TENCENT_ENDPOINT]:
+            try:
+                client = TencentdnsClient(secret_id, secret_key, endpoint)
+                req = tencent_models.DescribeRecordListRequest()
+                req.Domain = domain_name
+                req.Subdomain = rr
+                req.RecordType = dns_type.upper()
+                await client.describeRecordList(req)
+            except Exception as e:  # noqa: BLE001
+                if tencent_is_endpoint_error(e):
+                    continue
+                if not isinstance(e, TencentCloudSDKException):
+                    return "invalid_params"
+                if e.code != "ResourceNotFound.NoDataOfRecord":
+                    return e.code
+            return None
+        return "cannot_connect"
 
     tasks = await asyncio.gather(
         async_check_dns_type(dns_type),
@@ -206,6 +274,14 @@ async def async_validate_tencent(
 class DdnsConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for WanIp."""
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        # Home Assistant 2024.11+ sets config_entry on the flow itself, the
+        # minimum version in hacs.json covers this.
+        return DdnsOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -237,8 +313,9 @@ class DdnsConfigFlow(ConfigFlow, domain=DOMAIN):
         domain_name = user_input.get(CONF_DOMAIN_NAME)
         domain = rr + "." + domain_name
 
+        endpoints = user_input.get(CONF_ENDPOINTS) or []
         error_code = await async_validate_ali(
-            access_key_id, access_key_secret, dns_type, rr, domain_name
+            access_key_id, access_key_secret, dns_type, rr, domain_name, endpoints
         )
         if error_code:
             return self.async_show_form(
@@ -260,6 +337,7 @@ class DdnsConfigFlow(ConfigFlow, domain=DOMAIN):
                 CONF_DOMAIN_RR: rr,
                 CONF_DOMAIN_NAME: domain_name,
             },
+            options={CONF_ENDPOINTS: endpoints},
         )
 
     async def async_step_tencent(
@@ -279,8 +357,9 @@ class DdnsConfigFlow(ConfigFlow, domain=DOMAIN):
         domain_name = user_input.get(CONF_DOMAIN_NAME)
         domain = rr + "." + domain_name
 
+        endpoints = user_input.get(CONF_ENDPOINTS) or []
         error_code = await async_validate_tencent(
-            secret_id, secret_key, dns_type, rr, domain_name
+            secret_id, secret_key, dns_type, rr, domain_name, endpoints
         )
         if error_code:
             return self.async_show_form(
@@ -302,4 +381,33 @@ class DdnsConfigFlow(ConfigFlow, domain=DOMAIN):
                 CONF_DOMAIN_RR: rr,
                 CONF_DOMAIN_NAME: domain_name,
             },
+            options={CONF_ENDPOINTS: endpoints},
+        )
+
+
+class DdnsOptionsFlow(OptionsFlow):
+    """Handle the options for a ddns record."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+
+        errors = {}
+        if user_input is not None:
+            try:
+                for line in user_input.get(CONF_TEMPLATES, []):
+                    parse_template(line)
+            except ValueError:
+                errors["base"] = "invalid_template"
+            else:
+                return self.async_create_entry(data=user_input)
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                data_schema_options, user_input or self.config_entry.options
+            ),
+            errors=errors,
+            # Shown literally in the template help and error texts.
+            description_placeholders={"ip": TEMPLATE_PLACEHOLDER},
         )
@@ -1,9 +1,9 @@
 """DDNS constants."""
 
-from homeassistant.const import Platform
-
 DOMAIN = "ddns"
-PLATFORMS = [Platform.SENSOR]
+# Platform.SENSOR, spelled out so the standalone daemon does not need
+# Home Assistant to import the constants.
+PLATFORMS = ["sensor"]
 
 DNS_HOSTNAME = "myip.opendns.com"
 DNS_RESOLVER = "208.67.222.222"
@@ -22,3 +22,46 @@ CONF_TENCENT_SECRET_ID = "secret_id"
 CONF_TENCENT_SECRET_KEY = "secret_key"
 CONF_DOMAIN_RR = "rr"
 CONF_DOMAIN_NAME = "domain_name"
+
+HISTORY_SIZE = 64
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SAVE_DELAY = 10
+HISTORY_DEFAULT_COUNT = 10
+ATTR_COUNT = "count"
+ATTR_STATISTICS = "statistics"
+SERVICE_GET_IP_HISTORY = "get_ip_history"
+
+CONF_PRECHECK = "precheck"
+
+CONF_ENDPOINTS = "endpoints"
+CONF_HEDGE = "hedge"
+ALI_ENDPOINT = "alidns.cn-hangzhou.aliyuncs.com"
+TENCENT_ENDPOINT = "dnspod.tencentcloudapi.com"
+ENDPOINT_EWMA_ALPHA = 0.3
+ENDPOINT_SAMPLES = 20
+ENDPOINT_HEDGE_DELAY = 1.0
+ENDPOINT_FAILURE_PENALTY = 10.0
+ENDPOINT_REPROBE_INTERVAL = 300
+ATTR_ENDPOINT_LATENCIES = "endpoint_latencies"
+
+CONF_INTERVAL = "interval"
+CONF_RECORDS = "records"
+DEFAULT_INTERVAL = 60
+
+PROVIDER_MAX_CONCURRENCY = 4
+
+CONF_TRANSPORT = "transport"
+TRANSPORT_UDP = "udp"
+TRANSPORT_TLS = "tls"
+DNS_TLS_HOSTNAME = "dns.opendns.com"
+DNS_TLS_PORT = 853
+DNS_TLS_TIMEOUT = 3
+DNS_TLS_RETRY_INTERVAL = 600
+DATA_CHANNELS = "channels"
+
+CONF_TEMPLATES = "templates"
+TEMPLATE_PLACEHOLDER = "{ip}"
+
+RR_APEX = "@"
+RR_WILDCARD = "*"
+RR_WILDCARD_PROBE = "ddns-precheck"
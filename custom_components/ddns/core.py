@@ -0,0 +1,243 @@
+"""Home Assistant independent ddns discovery and sync."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from ipaddress import IPv4Address, IPv6Address, ip_address
+import logging
+import re
+
+import aiodns
+from aiodns.error import DNSError
+
+from .const import (
+    DNS_HOSTNAME,
+    DNS_IPV4_TYPE,
+    DNS_IPV6_TYPE,
+    DNS_PORT,
+    DNS_RESOLVER,
+    DNS_RESOLVER_IPV6,
+    DNS_TLS_HOSTNAME,
+    DNS_TLS_PORT,
+    RR_APEX,
+    RR_WILDCARD,
+    RR_WILDCARD_PROBE,
+    TEMPLATE_PLACEHOLDER,
+    TRANSPORT_TLS,
+    TRANSPORT_UDP,
+)
+from .precheck import AuthoritativePrecheck
+from .reconcile import DesiredRecord, DnsProvider, ProviderError, async_reconcile
+from .transport import DotChannel, FallbackResolver
+
+DEFAULT_RETRIES = 2
+MAX_RESULTS = 10
+
+_LOGGER = logging.getLogger(__name__)
+
+# An address of each family as a whole token, so a hex word or a longer
+# dotted number never counts as one. A dot followed by a label, as in
+# host-{ip}.example.com, still ends the address.
+_ADDRESS_PATTERNS = {
+    4: r"(?<![\w.])\d{1,3}(?:\.\d{1,3}){3}(?![\w:])(?!\.\d)",
+    6: r"(?<![\w.])[0-9a-fA-F]{0,4}(?::[0-9a-fA-F]{0,4}){2,7}(?![\w:])(?!\.\d)",
+}
+# Addresses a template is rendered with to check it recognises its value.
+_SAMPLE_IPS = ("192.0.2.1", "2001:db8::1")
+
+
+def sort_ips(ips: list, querytype: str) -> list:
+    """Join IPs into a single string."""
+
+    if querytype.lower() == DNS_IPV6_TYPE.lower():
+        ips = [IPv6Address(ip) for ip in ips]
+    else:
+        ips = [IPv4Address(ip) for ip in ips]
+    return [str(ip) for ip in sorted(ips)][:MAX_RESULTS]
+
+
+def record_host(rr: str, domain_name: str) -> str:
+    """Return the name rr serves, mapping the apex and wildcard notations.
+
+    A wildcard is looked up through a probe label it is expected to cover.
+    """
+    if rr == RR_APEX:
+        return domain_name
+    labels = [
+        RR_WILDCARD_PROBE if label == RR_WILDCARD else label for label in rr.split(".")
+    ]
+    return ".".join([*labels, domain_name])
+
+
+def create_resolver(
+    dns_type: str,
+    transport: str = TRANSPORT_UDP,
+    channels: dict[str, DotChannel] | None = None,
+) -> aiodns.DNSResolver | FallbackResolver:
+    """Return a resolver for discovering the public address.
+
+    With the TLS transport, queries go over a DotChannel taken from channels
+    so every record using the same resolver shares one connection.
+    """
+    dns_resolver = (
+        DNS_RESOLVER if dns_type.lower() == DNS_IPV4_TYPE else DNS_RESOLVER_IPV6
+    )
+    udp_resolver = aiodns.DNSResolver(
+        nameservers=[dns_resolver], tcp_port=DNS_PORT, udp_port=DNS_PORT
+    )
+    if transport != TRANSPORT_TLS:
+        return udp_resolver
+    if channels is None:
+        channels = {}
+    if dns_resolver not in channels:
+        channels[dns_resolver] = DotChannel(
+            dns_resolver, DNS_TLS_PORT, server_hostname=DNS_TLS_HOSTNAME
+        )
+    return FallbackResolver(channels[dns_resolver], udp_resolver)
+
+
+@dataclass(frozen=True)
+class TemplateRecord:
+    """A record whose value is rendered from the discovered address."""
+
+    rr: str
+    type: str
+    template: str
+
+    @property
+    def prefix(self) -> str:
+        """Return the first word of the template before the placeholder."""
+        head = self.template.split(TEMPLATE_PLACEHOLDER, 1)[0]
+        return head.split(maxsplit=1)[0] if head.strip() else ""
+
+    def render(self, ip: str) -> DesiredRecord:
+        """Return the desired record for ip.
+
+        Only existing records starting with the template prefix, e.g.
+        "v=spf1", and holding an address of the same family are touched, so
+        other records sharing the rr/type, e.g. verification TXT, are kept
+        while a record published from an earlier version of the template is
+        replaced.
+        """
+        address = _ADDRESS_PATTERNS[ip_address(ip).version]
+        pattern = rf"{re.escape(self.prefix)}.*?{address}.*"
+        return DesiredRecord(
+            self.rr,
+            self.type,
+            (self.template.replace(TEMPLATE_PLACEHOLDER, ip),),
+            pattern=pattern,
+        )
+
+
+def parse_template(line: str) -> TemplateRecord:
+    """Parse an "rr type value" line, e.g. "@ TXT v=spf1 ip4:{ip} -all".
+
+    The value must contain the placeholder and the rendered value must be
+    recognised by its own pattern, otherwise the record would be created
+    again on every cycle.
+    """
+    parts = line.split(maxsplit=2)
+    if len(parts) != 3 or not parts[1].isalpha():
+        raise ValueError(f"Invalid record template: {line}")
+    rr, record_type, template = parts
+    if TEMPLATE_PLACEHOLDER not in template:
+        raise ValueError(f"Record template without {TEMPLATE_PLACEHOLDER}: {line}")
+    record = TemplateRecord(rr, record_type.upper(), template)
+    for ip in _SAMPLE_IPS:
+        desired = record.render(ip)
+        if not re.fullmatch(desired.pattern, desired.values[0]):
+            raise ValueError(f"Record template does not match its value: {line}")
+    return record
+
+
+class DdnsUpdater:
+    """Discover the public address and sync one record with the provider."""
+
+    def __init__(
+        self,
+        provider: DnsProvider,
+        dns_type: str,
+        rr: str,
+        domain_name: str,
+        resolver: aiodns.DNSResolver | None = None,
+        precheck: bool = False,
+        transport: str = TRANSPORT_UDP,
+        channels: dict[str, DotChannel] | None = None,
+        templates: list[TemplateRecord] | None = None,
+    ) -> None:
+        """Initialize the updater."""
+        self.provider = provider
+        self.dns_type = dns_type.upper()
+        self.rr = rr
+        self.domain_name = domain_name
+        self.resolver = resolver or create_resolver(dns_type, transport, channels)
+        self.precheck = (
+            AuthoritativePrecheck(
+                domain_name, record_host(rr, domain_name), self.dns_type
+            )
+            if precheck
+            else None
+        )
+        self.templates = templates or []
+        self.ips: list[str] = []
+        # The address last written, so the same record is repointed next time.
+        self.published: str | None = None
+        self.available = True
+        self._retries = DEFAULT_RETRIES
+        self._synced: list[DesiredRecord] | None = None
+
+    async def async_close(self) -> None:
+        """Release the resolvers owned by the updater."""
+        if self.precheck is not None:
+            await self.precheck.async_close()
+
+    def _failed(self) -> None:
+        """Count a failed cycle."""
+        if self._retries > 0:
+            self._retries -= 1
+        else:
+            self.available = False
+
+    async def async_discover(self) -> list[str] | None:
+        """Return the public addresses of this host."""
+        try:
+            response = await self.resolver.query(host=DNS_HOSTNAME, qtype=self.dns_type)
+        except DNSError as err:
+            _LOGGER.warning("Exception while resolving host: %s", err)
+            self.resolver.cancel()
+            return None
+        if not response:
+            return None
+        return sort_ips([res.host for res in response], querytype=self.dns_type)
+
+    async def async_update(self) -> str | None:
+        """Run one cycle, return the discovered address."""
+        ips = await self.async_discover()
+        if not ips:
+            self._failed()
+            return None
+        ip = ips[0]
+        self.ips = ips
+        self.available = True
+        # Derived records are reconciled in the same pass as the address so
+        # one change produces one set of writes over the same client.
+        previous = (self.published,) if self.published else ()
+        desired = [DesiredRecord(self.rr, self.dns_type, (ip,), previous=previous)]
+        desired.extend(template.render(ip) for template in self.templates)
+        # The precheck only sees the address record, trust it for the derived
+        # ones once they have been reconciled with the same values.
+        if (
+            self.precheck is None
+            or (self.templates and desired != self._synced)
+            or not await self.precheck.async_is_current(ip)
+        ):
+            try:
+                await async_reconcile(self.provider, self.domain_name, desired)
+            except ProviderError as err:
+                _LOGGER.warning("Exception while syncing record: %s", err)
+                self._failed()
+                return ip
+            self._synced = desired
+            self.published = ip
+        self._retries = DEFAULT_RETRIES
+        return ip
@@ -0,0 +1,142 @@
+"""Standalone ddns daemon for hosts without Home Assistant.
+
+Usage::
+
+    python -m custom_components.ddns.daemon ddns.yaml
+
+The configuration file is YAML, or TOML when its name ends in ``.toml``.
+Every record takes the same keys as a config entry and its options::
+
+    interval: 60
+    records:
+      - dns_server: ali
+        access_key_id: ...
+        access_key_secret: ...
+        dns_type: a
+        rr: home
+        domain_name: example.com
+        templates:
+          - "@ TXT v=spf1 ip4:{ip} -all"
+
+Provider SDKs are imported only for the ``dns_server`` values in use.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import logging
+from pathlib import Path
+from typing import Any
+
+from .const import (
+    CONF_DNS_SERVER,
+    CONF_DNS_SERVER_ALI,
+    CONF_DNS_SERVER_TENCENT,
+    CONF_DOMAIN_NAME,
+    CONF_DOMAIN_RR,
+    CONF_INTERVAL,
+    CONF_PRECHECK,
+    CONF_RECORDS,
+    CONF_TEMPLATES,
+    CONF_TRANSPORT,
+    DEFAULT_INTERVAL,
+    DNS_IPV4_TYPE,
+    DNS_TYPE,
+    TRANSPORT_UDP,
+)
+from .core import DdnsUpdater, parse_template
+from .transport import DotChannel
+
+_LOGGER = logging.getLogger(__name__)
+
+PROVIDERS = {
+    CONF_DNS_SERVER_ALI: (".alidns", "AliProvider"),
+    CONF_DNS_SERVER_TENCENT: (".tencentdns", "TencentProvider"),
+}
+
+
+def load_config(path: Path) -> dict[str, Any]:
+    """Load the daemon configuration from a YAML or TOML file."""
+    if path.suffix == ".toml":
+        import tomllib
+
+        with path.open("rb") as file:
+            return tomllib.load(file)
+    import yaml
+
+    with path.open(encoding="utf-8") as file:
+        return yaml.safe_load(file) or {}
+
+
+def create_updater(
+    record: dict[str, Any], channels: dict[str, DotChannel]
+) -> DdnsUpdater:
+    """Create the updater for one configured record."""
+    module_name, class_name = PROVIDERS[record[CONF_DNS_SERVER]]
+    module = importlib.import_module(module_name, __package__)
+    provider = getattr(module, class_name).from_config(record)
+    return DdnsUpdater(
+        provider,
+        record.get(DNS_TYPE, DNS_IPV4_TYPE),
+        record[CONF_DOMAIN_RR],
+        record[CONF_DOMAIN_NAME],
+        precheck=record.get(CONF_PRECHECK, False),
+        transport=record.get(CONF_TRANSPORT, TRANSPORT_UDP),
+        channels=channels,
+        templates=[parse_template(line) for line in record.get(CONF_TEMPLATES, [])],
+    )
+
+
+async def async_update(updater: DdnsUpdater) -> None:
+    """Run one cycle of updater and log the outcome."""
+    name = f"{updater.rr}.{updater.domain_name}"
+    try:
+        ip = await updater.async_update()
+    except Exception:
+        _LOGGER.exception("Error updating %s", name)
+        return
+    if ip is None:
+        _LOGGER.warning("%s %s unavailable", name, updater.dns_type)
+    else:
+        _LOGGER.debug("%s %s -> %s", name, updater.dns_type, ip)
+    _LOGGER.debug("%s endpoint latencies: %s", name, updater.provider.pool.latencies())
+
+
+async def async_run(config: dict[str, Any], once: bool = False) -> None:
+    """Sync all configured records every interval seconds."""
+    channels: dict[str, DotChannel] = {}
+    updaters = [
+        create_updater(record, channels) for record in config.get(CONF_RECORDS, [])
+    ]
+    interval = config.get(CONF_INTERVAL, DEFAULT_INTERVAL)
+    try:
+        while True:
+            await asyncio.gather(*(async_update(updater) for updater in updaters))
+            if once:
+                return
+            await asyncio.sleep(interval)
+    finally:
+        for channel in channels.values():
+            channel.cancel()
+        for updater in updaters:
+            await updater.async_close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the daemon."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", type=Path, help="YAML or TOML configuration file")
+    parser.add_argument("--once", action="store_true", help="run one cycle and exit")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        asyncio.run(async_run(load_config(args.config), once=args.once))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
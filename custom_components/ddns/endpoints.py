@@ -0,0 +1,151 @@
+"""Latency-aware endpoint selection for provider clients."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+import logging
+import math
+import time
+from typing import Any, Generic, TypeVar
+
+from .const import (
+    ENDPOINT_EWMA_ALPHA,
+    ENDPOINT_FAILURE_PENALTY,
+    ENDPOINT_HEDGE_DELAY,
+    ENDPOINT_REPROBE_INTERVAL,
+    ENDPOINT_SAMPLES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_ClientT = TypeVar("_ClientT")
+
+
+class EndpointPool(Generic[_ClientT]):
+    """A set of clients for the same provider, one per endpoint.
+
+    Every call is timed and folded into an EWMA latency score per endpoint;
+    failures count as ENDPOINT_FAILURE_PENALTY seconds and a call abandoned by
+    a hedge counts the time it was kept waiting. Reads can be hedged: when the
+    best endpoint has not answered within its p95 latency the same request is
+    sent to the next one and the first answer wins. Writes are never hedged
+    and always go to the healthiest endpoint. An endpoint without a sample for
+    ENDPOINT_REPROBE_INTERVAL seconds is tried first by the next read so a
+    penalized endpoint can recover.
+    """
+
+    def __init__(
+        self,
+        clients: dict[str, _ClientT],
+        is_endpoint_error: Callable[[Exception], bool],
+    ) -> None:
+        """Initialize the pool."""
+        self._clients = clients
+        self._endpoints = list(clients)
+        self._is_endpoint_error = is_endpoint_error
+        self._ewma: dict[str, float] = {}
+        self._sampled_at: dict[str, float] = {}
+        self._samples: dict[str, deque[float]] = {
+            endpoint: deque(maxlen=ENDPOINT_SAMPLES) for endpoint in self._endpoints
+        }
+
+    def ranked(self, probe: bool = False) -> list[str]:
+        """Return the endpoints, healthiest first.
+
+        Endpoints that have not been measured yet sort first so every
+        configured endpoint gets scored. With probe, so do endpoints whose
+        score has gone stale.
+        """
+        stale_before = time.monotonic() - ENDPOINT_REPROBE_INTERVAL
+
+        def _score(endpoint: str) -> float:
+            if probe and self._sampled_at.get(endpoint, 0) < stale_before:
+                return 0
+            return self._ewma.get(endpoint, 0)
+
+        return sorted(self._endpoints, key=_score)
+
+    def p95(self, endpoint: str) -> float:
+        """Return the 95th percentile latency of endpoint."""
+        samples = sorted(self._samples[endpoint])
+        if len(samples) < 5:
+            return ENDPOINT_HEDGE_DELAY
+        return samples[math.ceil(len(samples) * 0.95) - 1]
+
+    def latencies(self) -> dict[str, float]:
+        """Return the current latency score of every measured endpoint."""
+        return {endpoint: round(score, 3) for endpoint, score in self._ewma.items()}
+
+    def _record(self, endpoint: str, latency: float) -> None:
+        """Fold a latency sample into the endpoint score."""
+        self._samples[endpoint].append(latency)
+        self._sampled_at[endpoint] = time.monotonic()
+        previous = self._ewma.get(endpoint)
+        if previous is None:
+            self._ewma[endpoint] = latency
+        else:
+            self._ewma[endpoint] = (
+                ENDPOINT_EWMA_ALPHA * latency + (1 - ENDPOINT_EWMA_ALPHA) * previous
+            )
+
+    async def _async_call(
+        self, endpoint: str, call: Callable[[_ClientT], Awaitable[Any]]
+    ) -> Any:
+        """Run call against endpoint and score it."""
+        start = time.monotonic()
+        try:
+            result = await call(self._clients[endpoint])
+        except asyncio.CancelledError:
+            # Lost a hedge, it was at least this slow.
+            self._record(endpoint, time.monotonic() - start)
+            raise
+        except Exception as err:
+            if self._is_endpoint_error(err):
+                _LOGGER.debug("Endpoint %s failed: %s", endpoint, err)
+                self._record(endpoint, ENDPOINT_FAILURE_PENALTY)
+            else:
+                self._record(endpoint, time.monotonic() - start)
+            raise
+        self._record(endpoint, time.monotonic() - start)
+        return result
+
+    async def async_read(
+        self, call: Callable[[_ClientT], Awaitable[Any]], hedge: bool = False
+    ) -> Any:
+        """Run a read, optionally hedged across endpoints."""
+        remaining = self.ranked(probe=True)
+        if not hedge:
+            return await self._async_call(remaining[0], call)
+        pending: set[asyncio.Task] = set()
+        error: Exception | None = None
+        try:
+            while remaining or pending:
+                timeout = None
+                if remaining:
+                    endpoint = remaining.pop(0)
+                    pending.add(asyncio.create_task(self._async_call(endpoint, call)))
+                    if remaining:
+                        timeout = self.p95(endpoint)
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    err = task.exception()
+                    if err is None:
+                        return task.result()
+                    if not self._is_endpoint_error(err):
+                        raise err
+                    error = err
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let the losers record their time before the next ranking.
+            await asyncio.gather(*pending, return_exceptions=True)
+        assert error is not None
+        raise error
+
+    async def async_write(self, call: Callable[[_ClientT], Awaitable[Any]]) -> Any:
+        """Run a write against the healthiest endpoint."""
+        return await self._async_call(self.ranked()[0], call)
@@ -0,0 +1,136 @@
+"""IP change history for ddns records."""
+
+from __future__ import annotations
+
+import base64
+from collections import deque
+from datetime import datetime, timezone
+from ipaddress import ip_address
+import struct
+import time
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    DNS_IPV6_TYPE,
+    DOMAIN,
+    HISTORY_SAVE_DELAY,
+    HISTORY_SIZE,
+    HISTORY_STORAGE_VERSION,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.storage import Store
+
+_TIMESTAMP = struct.Struct(">I")
+
+
+def history_key(rr: str, domain_name: str, dns_type: str) -> str:
+    """Return the key the history of a record is stored under."""
+    return f"{rr}.{domain_name}_{dns_type}"
+
+
+def history_store(hass: HomeAssistant, key: str) -> Store[dict[str, Any]]:
+    """Return the history store of a record."""
+    # Imported here so the history can be used without Home Assistant.
+    from homeassistant.helpers.storage import Store
+
+    return Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.history.{key}")
+
+
+async def async_remove_history(hass: HomeAssistant, key: str) -> None:
+    """Delete the stored history of a record."""
+    await history_store(hass, key).async_remove()
+
+
+class IpHistory:
+    """Bounded ring buffer of IP changes for one record.
+
+    Every entry is a 4 byte timestamp followed by the packed address, so an
+    A record costs 8 bytes and an AAAA record 20 bytes per change. The buffer
+    is persisted as a single base64 string in a ``Store`` file.
+    """
+
+    def __init__(
+        self,
+        store: Store[dict[str, Any]],
+        dns_type: str,
+        maxlen: int = HISTORY_SIZE,
+    ) -> None:
+        """Initialize the history."""
+        self._address_size = 16 if dns_type.lower() == DNS_IPV6_TYPE else 4
+        self._entries: deque[tuple[int, bytes]] = deque(maxlen=maxlen)
+        self._store = store
+
+    @property
+    def last_ip(self) -> str | None:
+        """Return the most recently recorded address."""
+        if not self._entries:
+            return None
+        return str(ip_address(self._entries[-1][1]))
+
+    async def async_load(self) -> None:
+        """Load the history from disk."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        raw = base64.b64decode(data.get("entries", ""))
+        size = _TIMESTAMP.size + self._address_size
+        for offset in range(0, len(raw) - size + 1, size):
+            (timestamp,) = _TIMESTAMP.unpack_from(raw, offset)
+            self._entries.append(
+                (timestamp, raw[offset + _TIMESTAMP.size : offset + size])
+            )
+
+    def record(self, ip: str, timestamp: float | None = None) -> bool:
+        """Record ip if it differs from the last one, return True on change."""
+        packed = ip_address(ip).packed
+        if self._entries and self._entries[-1][1] == packed:
+            return False
+        if timestamp is None:
+            timestamp = time.time()
+        self._entries.append((int(timestamp), packed))
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+        return True
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the packed history for the store."""
+        raw = b"".join(
+            _TIMESTAMP.pack(timestamp) + packed for timestamp, packed in self._entries
+        )
+        return {"entries": base64.b64encode(raw).decode("ascii")}
+
+    def statistics(self, count: int = 0, now: float | None = None) -> dict[str, Any]:
+        """Return change-rate statistics and the last count changes.
+
+        The rates span from the first observed address up to now, so the
+        current stable period counts too. The first observed address is not a
+        change and is reported as observed_since only.
+        """
+        entries = list(self._entries)
+        changes = max(len(entries) - 1, 0)
+        stats: dict[str, Any] = {
+            "changes": changes,
+            "observed_since": None,
+            "mean_stable_duration": None,
+            "changes_per_day": None,
+        }
+        if entries:
+            if now is None:
+                now = time.time()
+            span = max(now - entries[0][0], 0)
+            stats["observed_since"] = _isoformat(entries[0][0])
+            # Every change starts a new stable period after the first one.
+            stats["mean_stable_duration"] = span / (changes + 1)
+            stats["changes_per_day"] = changes * 86400 / span if span else None
+        if count:
+            stats["last_changes"] = [
+                {"ip": str(ip_address(packed)), "time": _isoformat(timestamp)}
+                for timestamp, packed in reversed(entries[1:][-count:])
+            ]
+        return stats
+
+
+def _isoformat(timestamp: int) -> str:
+    """Return timestamp as an ISO 8601 UTC string."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
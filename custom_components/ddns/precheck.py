@@ -0,0 +1,96 @@
+"""Authoritative DNS precheck for ddns records."""
+
+from __future__ import annotations
+
+from ipaddress import ip_address
+import logging
+
+import aiodns
+from aiodns.error import (
+    ARES_ECONNREFUSED,
+    ARES_EREFUSED,
+    ARES_ESERVFAIL,
+    ARES_ETIMEOUT,
+    DNSError,
+)
+
+from .const import DNS_PORT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Errors that point at the nameservers rather than at the query.
+_NAMESERVER_ERRORS = (ARES_ECONNREFUSED, ARES_EREFUSED, ARES_ESERVFAIL, ARES_ETIMEOUT)
+
+
+async def _async_close(resolver: aiodns.DNSResolver) -> None:
+    """Close resolver, aiodns before 3.3 can only cancel its queries."""
+    close = getattr(resolver, "close", None)
+    if close is None:
+        resolver.cancel()
+    else:
+        await close()
+
+
+class AuthoritativePrecheck:
+    """Ask the zone's authoritative nameservers what a record currently serves.
+
+    A plain DNS query is much cheaper than a signed API read, so the provider
+    API only has to be called when the served value differs from the
+    discovered address.
+    """
+
+    def __init__(self, domain_name: str, host: str, dns_type: str) -> None:
+        """Initialize the precheck."""
+        self.domain_name = domain_name
+        self.host = host
+        self.dns_type = dns_type.upper()
+        self._system_resolver: aiodns.DNSResolver | None = None
+        self._resolver: aiodns.DNSResolver | None = None
+
+    async def _async_get_resolver(self) -> aiodns.DNSResolver:
+        """Return a resolver pointed at the zone's nameservers."""
+        if self._resolver is None:
+            if self._system_resolver is None:
+                self._system_resolver = aiodns.DNSResolver()
+            system_resolver = self._system_resolver
+            ns_records = await system_resolver.query(self.domain_name, "NS")
+            nameservers: list[str] = []
+            for ns in ns_records:
+                try:
+                    addresses = await system_resolver.query(ns.host, "A")
+                except DNSError:
+                    continue
+                nameservers.extend(address.host for address in addresses)
+            if not nameservers:
+                raise DNSError(None, f"No nameservers found for {self.domain_name}")
+            self._resolver = aiodns.DNSResolver(
+                nameservers=nameservers, tcp_port=DNS_PORT, udp_port=DNS_PORT
+            )
+        return self._resolver
+
+    async def async_is_current(self, ip: str) -> bool:
+        """Return True if the authoritative nameservers already serve ip."""
+        try:
+            resolver = await self._async_get_resolver()
+            response = await resolver.query(self.host, self.dns_type)
+        except DNSError as err:
+            _LOGGER.debug("Authoritative precheck failed for %s: %s", self.host, err)
+            if err.args and err.args[0] in _NAMESERVER_ERRORS:
+                # Nameservers may have moved, look them up again next time.
+                await self._async_drop_resolver()
+            return False
+        served = {ip_address(res.host) for res in response}
+        return served == {ip_address(ip)}
+
+    async def _async_drop_resolver(self) -> None:
+        """Close and forget the nameserver resolver."""
+        resolver, self._resolver = self._resolver, None
+        if resolver is not None:
+            await _async_close(resolver)
+
+    async def async_close(self) -> None:
+        """Close the resolvers of the precheck."""
+        await self._async_drop_resolver()
+        resolver, self._system_resolver = self._system_resolver, None
+        if resolver is not None:
+            await _async_close(resolver)
@@ -0,0 +1,199 @@
+"""Provider neutral desired-state reconcile engine."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+import logging
+import re
+from typing import TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    from .endpoints import EndpointPool
+
+_LOGGER = logging.getLogger(__name__)
+
+ACTION_CREATE = "create"
+ACTION_UPDATE = "update"
+ACTION_DELETE = "delete"
+
+
+class ProviderError(Exception):
+    """A provider call failed in a way the next cycle may recover from."""
+
+
+@dataclass(frozen=True)
+class DesiredRecord:
+    """The values one rr/type pair should serve.
+
+    When pattern is set only existing values matching it are managed, other
+    records of the same rr/type are left alone. Extra records are only
+    deleted with prune, by default they are kept as they are. previous holds
+    the values published last time, records still serving them are reused
+    first so a hand-added record is not repointed instead.
+    """
+
+    rr: str
+    type: str
+    values: tuple[str, ...]
+    ttl: int | None = None
+    pattern: str | None = None
+    prune: bool = False
+    previous: tuple[str, ...] = field(default=(), compare=False)
+
+
+@dataclass(frozen=True)
+class ActualRecord:
+    """A record as reported by the provider."""
+
+    record_id: str
+    rr: str
+    type: str
+    value: str
+    ttl: int | None = None
+
+
+@dataclass(frozen=True)
+class PlanOp:
+    """A single create, update or delete call."""
+
+    action: str
+    rr: str
+    type: str
+    value: str
+    ttl: int | None = None
+    record_id: str | None = None
+
+
+class DnsProvider(Protocol):
+    """Record operations of a dns provider."""
+
+    max_concurrency: int
+    pool: EndpointPool[Any]
+
+    async def async_list_records(
+        self, domain_name: str, rr: str, record_type: str
+    ) -> list[ActualRecord]:
+        """Return the records of rr/record_type, raise ProviderError on failure."""
+
+    async def async_create_record(self, domain_name: str, op: PlanOp) -> None:
+        """Create a record."""
+
+    async def async_update_record(self, domain_name: str, op: PlanOp) -> None:
+        """Point an existing record at a new value."""
+
+    async def async_delete_record(self, domain_name: str, op: PlanOp) -> None:
+        """Delete a record."""
+
+
+def plan(desired: DesiredRecord, actual: Iterable[ActualRecord]) -> list[PlanOp]:
+    """Return the smallest list of ops turning actual into desired.
+
+    Records that already serve a desired value are kept, leftover records are
+    reused for the remaining values and only what is still missing is
+    created, starting with records that served desired.previous. Records left
+    over after that are deleted if desired.prune is set, e.g. a second A
+    record added by hand survives otherwise.
+    """
+    missing = list(dict.fromkeys(desired.values))
+    leftover: list[ActualRecord] = []
+    ops: list[PlanOp] = []
+    for record in actual:
+        if desired.pattern is not None and not re.fullmatch(
+            desired.pattern, record.value
+        ):
+            continue
+        if record.value in missing:
+            missing.remove(record.value)
+            if desired.ttl is not None and record.ttl != desired.ttl:
+                ops.append(_op(ACTION_UPDATE, desired, record.value, record))
+        else:
+            leftover.append(record)
+    leftover.sort(key=lambda record: record.value not in desired.previous)
+    for value in missing:
+        if leftover:
+            ops.append(_op(ACTION_UPDATE, desired, value, leftover.pop(0)))
+        else:
+            ops.append(_op(ACTION_CREATE, desired, value))
+    if desired.prune:
+        ops.extend(
+            _op(ACTION_DELETE, desired, record.value, record) for record in leftover
+        )
+    return ops
+
+
+def _op(
+    action: str,
+    desired: DesiredRecord,
+    value: str,
+    record: ActualRecord | None = None,
+) -> PlanOp:
+    """Build a plan op for desired."""
+    return PlanOp(
+        action=action,
+        rr=desired.rr,
+        type=desired.type,
+        value=value,
+        ttl=desired.ttl,
+        record_id=record.record_id if record else None,
+    )
+
+
+async def _async_gather_limited(
+    calls: Iterable[Callable[[], Awaitable]], limit: int
+) -> list:
+    """Run calls concurrently, at most limit at a time."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _async_run(call: Callable[[], Awaitable]):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(
+        *(_async_run(call) for call in calls), return_exceptions=True
+    )
+
+
+def _raise_first(results: list) -> None:
+    """Raise the first failure of a gather as ProviderError."""
+    for result in results:
+        if isinstance(result, ProviderError):
+            raise result
+        if isinstance(result, Exception):
+            raise ProviderError(result) from result
+
+
+async def async_reconcile(
+    provider: DnsProvider, domain_name: str, desired: list[DesiredRecord]
+) -> list[PlanOp]:
+    """Make provider serve desired, return the executed plan."""
+    results = await _async_gather_limited(
+        (
+            lambda record=record: provider.async_list_records(
+                domain_name, record.rr, record.type
+            )
+            for record in desired
+        ),
+        provider.max_concurrency,
+    )
+    _raise_first(results)
+    ops = [
+        op
+        for record, actual in zip(desired, results, strict=True)
+        for op in plan(record, actual)
+    ]
+    if not ops:
+        return ops
+    _LOGGER.debug("Reconciling %s: %s", domain_name, ops)
+    handlers = {
+        ACTION_CREATE: provider.async_create_record,
+        ACTION_UPDATE: provider.async_update_record,
+        ACTION_DELETE: provider.async_delete_record,
+    }
+    results = await _async_gather_limited(
+        (lambda op=op: handlers[op.action](domain_name, op) for op in ops),
+        provider.max_concurrency,
+    )
+    _raise_first(results)
+    return ops
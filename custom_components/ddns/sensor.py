@@ -3,26 +3,23 @@
 from __future__ import annotations
 
 from datetime import timedelta
-from ipaddress import IPv4Address, IPv6Address
 import logging
 
 import aiodns
-from aiodns.error import DNSError
-from alibabacloud_alidns20150109 import models as alidns_models
-from alibabacloud_tea_openapi import models as open_api_models
-from tencentcloud.common.exception.tencent_cloud_sdk_exception import (
-    TencentCloudSDKException,
-)
-from tencentcloud.dnspod.v20210323 import models as tencent_models
+import voluptuous as vol
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceResponse, SupportsResponse
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .alidns import AlidnsClient
+from .alidns import AlidnsClient, AliProvider
 from .const import (
+    ATTR_COUNT,
+    ATTR_ENDPOINT_LATENCIES,
+    ATTR_STATISTICS,
     CONF_ALI_ACCESS_KEY_ID,
     CONF_ALI_ACCESS_KEY_SECRET,
     CONF_DNS_SERVER,
@@ -30,36 +27,32 @@ from .const import (
     CONF_DNS_SERVER_TENCENT,
     CONF_DOMAIN_NAME,
     CONF_DOMAIN_RR,
+    CONF_ENDPOINTS,
+    CONF_HEDGE,
+    CONF_PRECHECK,
     CONF_TENCENT_SECRET_ID,
+    CONF_TEMPLATES,
     CONF_TENCENT_SECRET_KEY,
-    DNS_HOSTNAME,
-    DNS_IPV4_TYPE,
-    DNS_IPV6_TYPE,
-    DNS_PORT,
+    CONF_TRANSPORT,
+    DATA_CHANNELS,
     DNS_RESOLVER,
-    DNS_RESOLVER_IPV6,
     DNS_TYPE,
+    DOMAIN,
+    HISTORY_DEFAULT_COUNT,
+    HISTORY_SIZE,
+    SERVICE_GET_IP_HISTORY,
+    TRANSPORT_UDP,
 )
-from .tencentdns import TencentdnsClient
-
-DEFAULT_RETRIES = 2
-MAX_RESULTS = 10
+from .core import DdnsUpdater, TemplateRecord, create_resolver, parse_template
+from .history import IpHistory, history_key, history_store
+from .reconcile import DnsProvider
+from .tencentdns import TencentdnsClient, TencentProvider
 
 _LOGGER = logging.getLogger(__name__)
 
 SCAN_INTERVAL = timedelta(seconds=60)
 
 
-def sort_ips(ips: list, querytype: str) -> list:
-    """Join IPs into a single string."""
-
-    if querytype.lower() == DNS_IPV6_TYPE.lower():
-        ips = [IPv6Address(ip) for ip in ips]
-    else:
-        ips = [IPv4Address(ip) for ip in ips]
-    return [str(ip) for ip in sorted(ips)][:MAX_RESULTS]
-
-
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -67,6 +60,26 @@ async def async_setup_entry(
 ) -> None:
     """Set up the platform from config_entry."""
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_IP_HISTORY,
+        {
+            vol.Optional(ATTR_COUNT, default=HISTORY_DEFAULT_COUNT): vol.All(
+                cv.positive_int, vol.Range(max=HISTORY_SIZE)
+            )
+        },
+        "async_get_ip_history",
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    # Records share one encrypted discovery connection per resolver, closed
+    # when the last entry unloads.
+    resolver = create_resolver(
+        entry.data[DNS_TYPE],
+        entry.options.get(CONF_TRANSPORT, TRANSPORT_UDP),
+        hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CHANNELS, {}),
+    )
+    templates = [parse_template(line) for line in entry.options.get(CONF_TEMPLATES, [])]
     dns_server = entry.data.get(CONF_DNS_SERVER)
     if dns_server == CONF_DNS_SERVER_ALI:
         access_key_id = entry.data.get(CONF_ALI_ACCESS_KEY_ID)
@@ -84,6 +97,11 @@ async def async_setup_entry(
                     dns_type=dns_type,
                     rr=rr,
                     domain_name=domain_name,
+                    resolver=resolver,
+                    templates=templates,
+                    precheck=entry.options.get(CONF_PRECHECK, False),
+                    endpoints=entry.options.get(CONF_ENDPOINTS),
+                    hedge=entry.options.get(CONF_HEDGE, False),
                 )
             ],
             update_before_add=True,
@@ -104,49 +122,52 @@ async def async_setup_entry(
                     dns_type=dns_type,
                     rr=rr,
                     domain_name=domain_name,
+                    resolver=resolver,
+                    templates=templates,
+                    precheck=entry.options.get(CONF_PRECHECK, False),
+                    endpoints=entry.options.get(CONF_ENDPOINTS),
+                    hedge=entry.options.get(CONF_HEDGE, False),
                 )
             ],
             update_before_add=True,
         )
 
 
-class AliDdns(SensorEntity):
-    """A aliddns sensor."""
+class DdnsSensor(SensorEntity):
+    """A ddns sensor."""
 
     # _attr_has_entity_name = True
-    _attr_translation_key = "aliddns"
-    _unrecorded_attributes = frozenset({"aliDnsClient", "resolver"})
+    _unrecorded_attributes = frozenset(
+        {"aliDnsClient", "resolver", ATTR_STATISTICS, ATTR_ENDPOINT_LATENCIES}
+    )
+    _history: IpHistory | None = None
 
     def __init__(
         self,
         name: str,
-        access_key_id: str,
-        access_key_secret: str,
+        provider: DnsProvider,
         dns_type: str,
         rr: str,
         domain_name: str,
-        aliDnsClient: AlidnsClient = None,
         resolver: aiodns.DNSResolver = None,
+        precheck: bool = False,
+        templates: list[TemplateRecord] | None = None,
     ) -> None:
         """Initialize the sensor."""
         self.name = name
         self._attr_name = name
         self._attr_unique_id = f"{name}_{dns_type}"
-        self._retries = DEFAULT_RETRIES
-        if resolver is None:
-            dns_resolver = (
-                DNS_RESOLVER if dns_type == DNS_IPV4_TYPE else DNS_RESOLVER_IPV6
-            )
-            self.resolver = aiodns.DNSResolver(
-                nameservers=[dns_resolver], tcp_port=DNS_PORT, udp_port=DNS_PORT
-            )
-        if aliDnsClient is None:
-            config = open_api_models.Config(
-                access_key_id=access_key_id, access_key_secret=access_key_secret
-            )
-            config.endpoint = "alidns.cn-hangzhou.aliyuncs.com"
-            self.aliDnsClient = AlidnsClient(config)
-        self.dns_type = dns_type.upper()
+        self._history_key = history_key(rr, domain_name, dns_type)
+        self.updater = DdnsUpdater(
+            provider,
+            dns_type,
+            rr,
+            domain_name,
+            resolver=resolver,
+            precheck=precheck,
+            templates=templates,
+        )
+        self.dns_type = self.updater.dns_type
         self.rr = rr
         self.domain_name = domain_name
         self._attr_extra_state_attributes = {
@@ -162,60 +183,86 @@ class AliDdns(SensorEntity):
             name="",
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Load the ip change history."""
+        self._history = IpHistory(
+            history_store(self.hass, self._history_key), self.dns_type
+        )
+        await self._history.async_load()
+        self.updater.published = self._history.last_ip
+        self._attr_extra_state_attributes[ATTR_STATISTICS] = self._history.statistics()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Close the precheck resolvers."""
+        await self.updater.async_close()
+
+    def _record_ip(self, ip: str) -> None:
+        """Add ip to the change history and refresh the statistics."""
+        if self._history is None:
+            return
+        self._history.record(ip)
+        # Refreshed every cycle, the rates include the current stable period.
+        self._attr_extra_state_attributes[ATTR_STATISTICS] = self._history.statistics()
+
+    async def async_get_ip_history(
+        self, count: int = HISTORY_DEFAULT_COUNT
+    ) -> ServiceResponse:
+        """Return change statistics and the last count changes."""
+        if self._history is None:
+            return {}
+        return self._history.statistics(count)
+
     async def async_update(self) -> None:
         """Get the current DNS IP address for hostname."""
 
-        try:
-            response = await self.resolver.query(host=DNS_HOSTNAME, qtype=self.dns_type)
-        except DNSError as err:
-            _LOGGER.warning("Exception while resolving host: %s", err)
-            self.resolver.cancel()
-            response = None
-        if response:
-            sorted_ips = sort_ips(
-                [res.host for res in response], querytype=self.dns_type
-            )
-            ip = sorted_ips[0]
-            self._attr_native_value = sorted_ips[0]
-            self._attr_extra_state_attributes["ip_addresses"] = sorted_ips
-            self._attr_available = True
-            request = alidns_models.DescribeSubDomainRecordsRequest()
-            request.sub_domain = self.rr + "." + self.domain_name
-            request.type = self.dns_type
-            records = await self.aliDnsClient.describe_sub_domain_records_async(request)
-            body = records.body
-            total_count = body.total_count
-            domain_records = body.domain_records
-            if total_count == 0:
-                request = alidns_models.AddDomainRecordRequest()
-                request.domain_name = self.domain_name
-                request.rr = self.rr
-                request.type = self.dns_type
-                request.value = ip
-                await self.aliDnsClient.add_domain_record_async(request)
-            else:
-                record = domain_records.record[0]
-                value = record.value
-                if value != ip:
-                    request = alidns_models.UpdateDomainRecordRequest()
-                    request.record_id = record.record_id
-                    request.rr = self.rr
-                    request.type = self.dns_type
-                    request.value = ip
-                    await self.aliDnsClient.update_domain_record_async(request)
-            self._retries = DEFAULT_RETRIES
-        elif self._retries > 0:
-            self._retries -= 1
-        else:
-            self._attr_available = False
+        ip = await self.updater.async_update()
+        if ip is not None:
+            self._attr_native_value = ip
+            self._attr_extra_state_attributes["ip_addresses"] = self.updater.ips
+            self._record_ip(ip)
+        self._attr_extra_state_attributes[ATTR_ENDPOINT_LATENCIES] = (
+            self.updater.provider.pool.latencies()
+        )
+        self._attr_available = self.updater.available
+
+
+class AliDdns(DdnsSensor):
+    """A aliddns sensor."""
+
+    _attr_translation_key = "aliddns"
+
+    def __init__(
+        self,
+        name: str,
+        access_key_id: str,
+        access_key_secret: str,
+        dns_type: str,
+        rr: str,
+        domain_name: str,
+        aliDnsClient: AlidnsClient = None,
+        resolver: aiodns.DNSResolver = None,
+        precheck: bool = False,
+        endpoints: list[str] | None = None,
+        hedge: bool = False,
+        templates: list[TemplateRecord] | None = None,
+    ) -> None:
+        """Initialize the sensor."""
+        provider = AliProvider(
+            access_key_id,
+            access_key_secret,
+            endpoints=endpoints,
+            hedge=hedge,
+            client=aliDnsClient,
+        )
+        super().__init__(
+            name, provider, dns_type, rr, domain_name, resolver, precheck, templates
+        )
 
 
-class TencentDdns(SensorEntity):
+class TencentDdns(DdnsSensor):
     """A tencent sensor."""
 
-    # _attr_has_entity_name = True
     _attr_translation_key = "tencentddns"
-    _unrecorded_attributes = frozenset({"aliDnsClient", "resolver"})
 
     def __init__(
         self,
@@ -227,94 +274,19 @@ class TencentDdns(SensorEntity):
         domain_name: str,
         tencentdnsClient: TencentdnsClient = None,
         resolver: aiodns.DNSResolver = None,
+        precheck: bool = False,
+        endpoints: list[str] | None = None,
+        hedge: bool = False,
+        templates: list[TemplateRecord] | None = None,
     ) -> None:
         """Initialize the sensor."""
-        self.name = name
-        self._attr_name = name
-        self._attr_unique_id = f"{name}_{dns_type}"
-        self._retries = DEFAULT_RETRIES
-        if resolver is None:
-            dns_resolver = (
-                DNS_RESOLVER if dns_type == DNS_IPV4_TYPE else DNS_RESOLVER_IPV6
-            )
-            self.resolver = aiodns.DNSResolver(
-                nameservers=[dns_resolver], tcp_port=DNS_PORT, udp_port=DNS_PORT
-            )
-        if tencentdnsClient is None:
-            self.tencentdnsClient = TencentdnsClient(secret_id, secret_key)
-        self.dns_type = dns_type.upper()
-        self.rr = rr
-        self.domain_name = domain_name
-        self._attr_extra_state_attributes = {
-            "domain": name,
-            "resolver": DNS_RESOLVER,
-            "type": self.dns_type,
-        }
-        self._attr_device_info = DeviceInfo(
-            entry_type=DeviceEntryType.SERVICE,
-            identifiers={(name, rr, domain_name)},
-            manufacturer="ocean",
-            model="1.1.0",
-            name="",
+        provider = TencentProvider(
+            secret_id,
+            secret_key,
+            endpoints=endpoints,
+            hedge=hedge,
+            client=tencentdnsClient,
+        )
+        super().__init__(
+            name, provider, dns_type, rr, domain_name, resolver, precheck, templates
         )
-
-    async def async_update(self) -> None:
-        """Get the current DNS IP address for hostname."""
-
-        try:
-            response = await self.resolver.query(host=DNS_HOSTNAME, qtype=self.dns_type)
-        except DNSError as err:
-            _LOGGER.warning("Exception while resolving host: %s", err)
-            self.resolver.cancel()
-            response = None
-            recordList = None
-        if response:
-            sorted_ips = sort_ips(
-                [res.host for res in response], querytype=self.dns_type
-            )
-            ip = sorted_ips[0]
-            self._attr_native_value = sorted_ips[0]
-            self._attr_extra_state_attributes["ip_addresses"] = sorted_ips
-            self._attr_available = True
-            total_count = None
-            try:
-                req = tencent_models.DescribeRecordListRequest()
-                req.Domain = self.domain_name
-                req.Subdomain = self.rr
-                req.RecordType = self.dns_type
-                resp = await self.tencentdnsClient.describeRecordList(req)
-                recordList = resp.RecordList
-            except TencentCloudSDKException as err:
-                if err.code == "ResourceNotFound.NoDataOfRecord":
-                    total_count = 0
-                else:
-                    if self._retries > 0:
-                        self._retries -= 1
-                    else:
-                        self._attr_available = False
-                    return
-            if total_count == 0:
-                req = tencent_models.CreateRecordRequest()
-                req.Domain = self.domain_name
-                req.RecordType = self.dns_type
-                req.RecordLine = "默认"
-                req.Value = ip
-                req.SubDomain = self.rr
-                await self.tencentdnsClient.createRecord(req)
-            else:
-                record = recordList[0]
-                value = record.Value
-                if value != ip:
-                    req = tencent_models.ModifyRecordRequest()
-                    req.Domain = self.domain_name
-                    req.RecordType = self.dns_type
-                    req.RecordLine = "默认"
-                    req.Value = ip
-                    req.RecordId = record.RecordId
-                    req.SubDomain = self.rr
-                    await self.tencentdnsClient.modifyRecord(req)
-            self._retries = DEFAULT_RETRIES
-        elif self._retries > 0:
-            self._retries -= 1
-        else:
-            self._attr_available = False
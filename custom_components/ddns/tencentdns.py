@@ -4,17 +4,39 @@ import asyncio
 from functools import partial
 import logging
 import sys
-from typing import Optional
+from typing import Any, Optional
 
 from tencentcloud.common import credential
+from tencentcloud.common.exception.tencent_cloud_sdk_exception import (
+    TencentCloudSDKException,
+)
 from tencentcloud.common.profile.client_profile import ClientProfile
 from tencentcloud.common.profile.http_profile import HttpProfile
 from tencentcloud.dnspod.v20210323 import models
 from tencentcloud.dnspod.v20210323.dnspod_client import DnspodClient
 
+from .const import (
+    CONF_ENDPOINTS,
+    CONF_HEDGE,
+    CONF_TENCENT_SECRET_ID,
+    CONF_TENCENT_SECRET_KEY,
+    PROVIDER_MAX_CONCURRENCY,
+    TENCENT_ENDPOINT,
+)
+from .endpoints import EndpointPool
+from .reconcile import ActualRecord, PlanOp, ProviderError
+
 logging.basicConfig(level=logging.INFO)
 
 
+def is_endpoint_error(err: Exception) -> bool:
+    """Return True if err means the endpoint could not be reached."""
+    return (
+        not isinstance(err, TencentCloudSDKException)
+        or err.code == "ClientNetworkError"
+    )
+
+
 class TencentdnsClient(DnspodClient):
     """ali dns."""
 
@@ -22,11 +44,12 @@ class TencentdnsClient(DnspodClient):
         self,
         secret_id,
         secret_key,
+        endpoint: str = TENCENT_ENDPOINT,
         loop: Optional[asyncio.AbstractEventLoop] = None,
     ):
         cred = credential.Credential(secret_id, secret_key)
         httpProfile = HttpProfile()
-        httpProfile.endpoint = "dnspod.tencentcloudapi.com"
+        httpProfile.endpoint = endpoint
         clientProfile = ClientProfile()
         clientProfile.httpProfile = httpProfile
         super().__init__(credential=cred, region="", profile=clientProfile)
@@ -68,3 +91,100 @@ class TencentdnsClient(DnspodClient):
             None,
             partial(self.ModifyRecord, request),
         )
+
+    async def deleteRecord(
+        self,
+        request: models.DeleteRecordRequest,
+    ) -> models.DeleteRecordResponse:
+        return await self.loop.run_in_executor(
+            None,
+            partial(self.DeleteRecord, request),
+        )
+
+
+class TencentProvider:
+    """tencent dns record operations."""
+
+    max_concurrency = PROVIDER_MAX_CONCURRENCY
+
+    def __init__(
+        self,
+        secret_id: str,
+        secret_key: str,
+        endpoints: Optional[list[str]] = None,
+        hedge: bool = False,
+        client: Optional[TencentdnsClient] = None,
+    ) -> None:
+        if client is None:
+            clients = {
+                endpoint: TencentdnsClient(secret_id, secret_key, endpoint)
+                for endpoint in endpoints or [TENCENT_ENDPOINT]
+            }
+        else:
+            clients = {TENCENT_ENDPOINT: client}
+        self.pool = EndpointPool(clients, is_endpoint_error)
+        self.hedge = hedge
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "TencentProvider":
+        return cls(
+            config[CONF_TENCENT_SECRET_ID],
+            config[CONF_TENCENT_SECRET_KEY],
+            endpoints=config.get(CONF_ENDPOINTS),
+            hedge=config.get(CONF_HEDGE, False),
+        )
+
+    async def async_list_records(
+        self, domain_name: str, rr: str, record_type: str
+    ) -> list[ActualRecord]:
+        req = models.DescribeRecordListRequest()
+        req.Domain = domain_name
+        req.Subdomain = rr
+        req.RecordType = record_type
+        req.RecordLine = "默认"
+        try:
+            resp = await self.pool.async_read(
+                lambda client: client.describeRecordList(req),
+                hedge=self.hedge,
+            )
+        except TencentCloudSDKException as err:
+            if err.code == "ResourceNotFound.NoDataOfRecord":
+                return []
+            raise ProviderError(err) from err
+        return [
+            ActualRecord(
+                record_id=record.RecordId,
+                rr=record.Name,
+                type=record.Type,
+                value=record.Value,
+                ttl=record.TTL,
+            )
+            for record in resp.RecordList or []
+        ]
+
+    async def async_create_record(self, domain_name: str, op: PlanOp) -> None:
+        req = models.CreateRecordRequest()
+        req.Domain = domain_name
+        req.RecordType = op.type
+        req.RecordLine = "默认"
+        req.Value = op.value
+        req.SubDomain = op.rr
+        req.TTL = op.ttl
+        await self.pool.async_write(lambda client: client.createRecord(req))
+
+    async def async_update_record(self, domain_name: str, op: PlanOp) -> None:
+        req = models.ModifyRecordRequest()
+        req.Domain = domain_name
+        req.RecordType = op.type
+        req.RecordLine = "默认"
+        req.Value = op.value
+        req.RecordId = op.record_id
+        req.SubDomain = op.rr
+        req.TTL = op.ttl
+        await self.pool.async_write(lambda client: client.modifyRecord(req))
+
+    async def async_delete_record(self, domain_name: str, op: PlanOp) -> None:
+        req = models.DeleteRecordRequest()
+        req.Domain = domain_name
+        req.RecordId = op.record_id
+        await self.pool.async_write(lambda client: client.deleteRecord(req))
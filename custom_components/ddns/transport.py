@@ -0,0 +1,245 @@
+"""DNS-over-TLS discovery transport with UDP fallback."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from ipaddress import IPv4Address, IPv6Address
+import logging
+import random
+import ssl
+import struct
+import time
+from typing import Any
+
+from aiodns.error import (
+    ARES_ECONNREFUSED,
+    ARES_ENODATA,
+    ARES_ENOTFOUND,
+    ARES_ESERVFAIL,
+    ARES_ETIMEOUT,
+    DNSError,
+)
+
+from .const import DNS_TLS_PORT, DNS_TLS_RETRY_INTERVAL, DNS_TLS_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+QTYPES = {"A": 1, "AAAA": 28}
+_HEADER = struct.Struct(">HHHHHH")
+_RR = struct.Struct(">HHIH")
+_RCODE_NXDOMAIN = 3
+_TYPE_OPT = 41
+_EDNS_PAYLOAD_SIZE = 1232
+# RFC 7828, sent empty by clients to ask the server to keep the connection.
+_OPTION_TCP_KEEPALIVE = 11
+
+
+@dataclass(frozen=True)
+class DnsAnswer:
+    """An address answer, shaped like the aiodns query result."""
+
+    host: str
+    ttl: int
+
+
+def encode_query(qid: int, name: str, qtype: str, keepalive: bool = False) -> bytes:
+    """Return a recursive query for name in DNS wire format.
+
+    With keepalive an EDNS edns-tcp-keepalive option is added.
+    """
+    question = b"".join(
+        bytes([len(label)]) + label.encode("ascii")
+        for label in name.rstrip(".").split(".")
+    )
+    message = (
+        _HEADER.pack(qid, 0x0100, 1, 0, 0, 1 if keepalive else 0)
+        + question
+        + b"\x00"
+        + struct.pack(">HH", QTYPES[qtype], 1)
+    )
+    if keepalive:
+        message += b"\x00" + _RR.pack(_TYPE_OPT, _EDNS_PAYLOAD_SIZE, 0, 4)
+        message += struct.pack(">HH", _OPTION_TCP_KEEPALIVE, 0)
+    return message
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    """Return the offset just past the name starting at offset."""
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+
+def decode_response(data: bytes, qtype: str) -> list[DnsAnswer]:
+    """Return the qtype answers of a DNS wire format response."""
+    _, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data)
+    rcode = flags & 0x000F
+    if rcode == _RCODE_NXDOMAIN:
+        raise DNSError(ARES_ENOTFOUND, "Domain name not found")
+    if rcode:
+        raise DNSError(ARES_ESERVFAIL, f"Server failure, rcode {rcode}")
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+    answers = []
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, ttl, rdlength = _RR.unpack_from(data, offset)
+        offset += _RR.size
+        rdata = data[offset : offset + rdlength]
+        offset += rdlength
+        if rtype != QTYPES[qtype]:
+            continue
+        address = IPv4Address(rdata) if rtype == QTYPES["A"] else IPv6Address(rdata)
+        answers.append(DnsAnswer(str(address), ttl))
+    if not answers:
+        raise DNSError(ARES_ENODATA, "DNS server returned answer with no data")
+    return answers
+
+
+class DotChannel:
+    """A persistent DNS-over-TLS connection shared by many queries.
+
+    Queries are multiplexed over one connection by message id (RFC 7858), so
+    only the first query after a (re)connect pays for the TLS handshake.
+    Every query asks for edns-tcp-keepalive (RFC 7828), but the server still
+    decides the idle timeout: when it is shorter than the poll interval the
+    connection is gone by the next cycle and that cycle reconnects, there is
+    no reconnect ahead of time. Passing ssl_context=False gives plain DNS
+    over TCP with the same framing, which is handy for a local stand-in
+    resolver.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DNS_TLS_PORT,
+        server_hostname: str | None = None,
+        ssl_context: ssl.SSLContext | bool = True,
+        timeout: float = DNS_TLS_TIMEOUT,
+    ) -> None:
+        """Initialize the channel."""
+        self.host = host
+        self.port = port
+        self.server_hostname = server_hostname
+        self.timeout = timeout
+        self._ssl = ssl_context
+        self._lock = asyncio.Lock()
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._pending: dict[int, asyncio.Future[bytes]] = {}
+
+    async def _async_connect(self) -> asyncio.StreamWriter:
+        """Return the open connection, connecting if needed."""
+        async with self._lock:
+            if self._writer is not None:
+                return self._writer
+            if self._ssl is True:
+                # Loading the CA bundle blocks, keep it off the event loop.
+                self._ssl = await asyncio.get_running_loop().run_in_executor(
+                    None, ssl.create_default_context
+                )
+            kwargs: dict[str, Any] = {}
+            if self._ssl:
+                kwargs = {"ssl": self._ssl, "server_hostname": self.server_hostname}
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, **kwargs), self.timeout
+            )
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._async_read(reader, writer))
+            return writer
+
+    async def _async_read(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Dispatch responses to the waiting queries until the connection ends."""
+        try:
+            while True:
+                (size,) = struct.unpack(">H", await reader.readexactly(2))
+                data = await reader.readexactly(size)
+                future = self._pending.pop(int.from_bytes(data[:2], "big"), None)
+                if future is not None and not future.done():
+                    future.set_result(data)
+        except (OSError, asyncio.IncompleteReadError) as err:
+            _LOGGER.debug("Connection to %s closed: %s", self.host, err)
+        finally:
+            self._close(writer)
+
+    def _close(self, writer: asyncio.StreamWriter) -> None:
+        """Drop writer and fail the queries waiting on it."""
+        if self._writer is not writer:
+            return
+        self._writer = None
+        writer.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(
+                    DNSError(ARES_ECONNREFUSED, f"Connection to {self.host} closed")
+                )
+        self._pending.clear()
+
+    async def query(self, host: str, qtype: str) -> list[DnsAnswer]:
+        """Resolve host, raise DNSError on failure."""
+        try:
+            writer = await self._async_connect()
+        except (OSError, asyncio.TimeoutError) as err:
+            raise DNSError(ARES_ECONNREFUSED, str(err)) from err
+        qid = random.randrange(0x10000)
+        while qid in self._pending:
+            qid = random.randrange(0x10000)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[qid] = future
+        message = encode_query(qid, host, qtype, keepalive=True)
+        try:
+            writer.write(struct.pack(">H", len(message)) + message)
+            data = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError as err:
+            # A stalled connection fails every query on it, start over.
+            self._close(writer)
+            raise DNSError(
+                ARES_ETIMEOUT, "Timeout while contacting DNS servers"
+            ) from err
+        finally:
+            self._pending.pop(qid, None)
+        return decode_response(data, qtype)
+
+    def cancel(self) -> None:
+        """Close the connection."""
+        if self._writer is not None:
+            self._close(self._writer)
+
+
+class FallbackResolver:
+    """Resolve over a primary channel and fall back to another resolver.
+
+    After a transport failure the primary is skipped for
+    DNS_TLS_RETRY_INTERVAL seconds so discovery does not wait out its timeout
+    on every cycle.
+    """
+
+    def __init__(self, primary: Any, fallback: Any) -> None:
+        """Initialize the resolver."""
+        self.primary = primary
+        self.fallback = fallback
+        self._retry_at = 0.0
+
+    async def query(self, host: str, qtype: str) -> list:
+        """Resolve host, raise DNSError on failure."""
+        if time.monotonic() >= self._retry_at:
+            try:
+                return await self.primary.query(host, qtype)
+            except DNSError as err:
+                if err.args and err.args[0] in (ARES_ENOTFOUND, ARES_ENODATA):
+                    raise
+                _LOGGER.debug("Falling back to UDP for %s: %s", host, err)
+                self._retry_at = time.monotonic() + DNS_TLS_RETRY_INTERVAL
+        return await self.fallback.query(host, qtype)
+
+    def cancel(self) -> None:
+        """Cancel the queries of the fallback resolver."""
+        self.fallback.cancel()
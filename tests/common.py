@@ -0,0 +1,75 @@
+"""Local stand-in resolvers for the ddns tests."""
+
+from __future__ import annotations
+
+import asyncio
+from ipaddress import ip_address
+import struct
+
+
+def build_response(query: bytes, address: str) -> bytes:
+    """Answer query with address, echoing its id and question."""
+    # The question ends at the root label, anything after it (EDNS) is dropped.
+    question = query[12 : query.index(b"\x00", 12) + 5]
+    packed = ip_address(address).packed
+    rtype = 1 if len(packed) == 4 else 28
+    answer = b"\xc0\x0c" + struct.pack(">HHIH", rtype, 1, 60, len(packed)) + packed
+    return query[:2] + struct.pack(">HHHHH", 0x8180, 1, 1, 0, 0) + question + answer
+
+
+class UdpStandIn(asyncio.DatagramProtocol):
+    """A UDP resolver answering every query with the same address."""
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.transport.sendto(build_response(data, self.address), addr)
+
+
+async def async_start_udp(address: str) -> tuple[asyncio.DatagramTransport, int]:
+    """Start a UDP stand-in on localhost, return it and its port."""
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: UdpStandIn(address), local_addr=("127.0.0.1", 0)
+    )
+    return transport, transport.get_extra_info("sockname")[1]
+
+
+class TcpStandIn:
+    """A DNS over TCP resolver, delay seconds late, counting connections."""
+
+    def __init__(self, address: str, delay: float = 0) -> None:
+        self.address = address
+        self.delay = delay
+        self.connections = 0
+        self.queries: list[bytes] = []
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        tasks: set[asyncio.Task] = set()
+        try:
+            while True:
+                (size,) = struct.unpack(">H", await reader.readexactly(2))
+                query = await reader.readexactly(size)
+                self.queries.append(query)
+                # Answer out of order like a real resolver, not one by one.
+                task = asyncio.create_task(self._async_answer(query, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _async_answer(self, query: bytes, writer: asyncio.StreamWriter) -> None:
+        await asyncio.sleep(self.delay)
+        response = build_response(query, self.address)
+        writer.write(struct.pack(">H", len(response)) + response)
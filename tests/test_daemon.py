@@ -0,0 +1,70 @@
+"""Tests for the standalone daemon."""
+
+import json
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).parent.parent
+
+# Runs one daemon cycle fully offline: discovery is answered by a local
+# stand-in resolver and the provider endpoint refuses the connection.
+SCRIPT = """
+import asyncio, json, resource, sys
+
+from custom_components.ddns import core, daemon
+from tests.common import async_start_udp
+
+async def main():
+    transport, port = await async_start_udp("192.0.2.1")
+    core.DNS_RESOLVER = "127.0.0.1"
+    core.DNS_PORT = port
+    await daemon.async_run(json.loads(sys.argv[1]), once=True)
+    transport.close()
+
+asyncio.run(main())
+print(json.dumps({
+    "modules": sorted(m.split(".")[0] for m in sys.modules),
+    "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+TENCENT_CONFIG = {
+    "records": [
+        {
+            "dns_server": "tencent",
+            "secret_id": "id",
+            "secret_key": "key",
+            "dns_type": "a",
+            "rr": "home",
+            "domain_name": "example.com",
+            "endpoints": ["127.0.0.1:1"],
+        }
+    ]
+}
+
+# Generous bounds around the figures documented in the README.
+MAX_SECONDS = 10
+MAX_RSS_KIB = 128 * 1024
+
+
+def test_once_with_tencent_only() -> None:
+    """One offline cycle finishes quickly and never loads the Ali SDK."""
+    start = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, json.dumps(TENCENT_CONFIG)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=MAX_SECONDS * 3,
+        check=True,
+    )
+    elapsed = time.monotonic() - start
+    stats = json.loads(result.stdout.splitlines()[-1])
+
+    assert "tencentcloud" in stats["modules"]
+    assert not [m for m in stats["modules"] if m.startswith("alibabacloud")]
+    assert "homeassistant" not in stats["modules"]
+    assert elapsed < MAX_SECONDS
+    assert stats["maxrss"] < MAX_RSS_KIB
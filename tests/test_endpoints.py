@@ -0,0 +1,64 @@
+"""Tests for the endpoint pool."""
+
+import asyncio
+
+from custom_components.ddns.endpoints import EndpointPool
+
+
+class FakeClient:
+    """A client answering after a configurable delay."""
+
+    def __init__(self, name: str, latencies: dict[str, float]) -> None:
+        self.name = name
+        self.latencies = latencies
+
+    async def read(self) -> str:
+        await asyncio.sleep(self.latencies[self.name])
+        return self.name
+
+
+def _pool(latencies: dict[str, float]) -> EndpointPool:
+    return EndpointPool(
+        {name: FakeClient(name, latencies) for name in latencies},
+        lambda err: True,
+    )
+
+
+def test_hedged_read_demotes_slowed_endpoint() -> None:
+    """A primary that turns slow loses its rank even when hedges win."""
+    latencies = {"a": 0.01, "b": 0.03}
+    pool = _pool(latencies)
+
+    async def run() -> list[str]:
+        for _ in range(6):
+            await pool.async_read(lambda client: client.read(), hedge=True)
+        latencies["a"] = 1
+        for _ in range(3):
+            assert (
+                await pool.async_read(lambda client: client.read(), hedge=True) == "b"
+            )
+        return pool.ranked()
+
+    assert asyncio.run(run())[0] == "b"
+
+
+def test_stale_endpoint_is_reprobed(monkeypatch) -> None:
+    """Reads retry a penalized endpoint once its score is stale, writes do not."""
+    latencies = {"a": 0.01, "b": 0.02}
+    pool = _pool(latencies)
+    pool._record("a", 10)
+    pool._record("b", 0.02)
+    assert pool.ranked(probe=True)[0] == "b"
+
+    monkeypatch.setattr("custom_components.ddns.endpoints.ENDPOINT_REPROBE_INTERVAL", 0)
+    pool._sampled_at["b"] = float("inf")
+    assert pool.ranked(probe=True)[0] == "a"
+    assert pool.ranked()[0] == "b"
+
+
+def test_latencies_report_measured_endpoints() -> None:
+    """Only endpoints with a sample are reported, rounded to milliseconds."""
+    pool = _pool({"a": 0.01, "b": 0.02})
+    pool._record("a", 0.12345)
+
+    assert pool.latencies() == {"a": 0.123}
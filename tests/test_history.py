@@ -0,0 +1,133 @@
+"""Tests for the ip change history."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from custom_components.ddns import async_remove_entry, history
+from custom_components.ddns.const import (
+    CONF_DOMAIN_NAME,
+    CONF_DOMAIN_RR,
+    DNS_TYPE,
+    HISTORY_SIZE,
+)
+from custom_components.ddns.history import IpHistory, history_key
+
+DAY = 86400
+
+
+class FakeStore:
+    """An in-memory stand-in for the Home Assistant Store."""
+
+    def __init__(self, data: dict[str, Any] | None = None) -> None:
+        self.data = data
+        self.removed = False
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return self.data
+
+    def async_delay_save(self, data_func, delay: float = 0) -> None:
+        self.data = data_func()
+
+    async def async_remove(self) -> None:
+        self.removed = True
+
+
+@pytest.mark.parametrize(
+    ("dns_type", "ips"),
+    [("a", ["192.0.2.1", "192.0.2.2"]), ("aaaa", ["2001:db8::1", "2001:db8::2"])],
+)
+def test_round_trip(dns_type: str, ips: list[str]) -> None:
+    """A saved history loads back with the same entries."""
+    store = FakeStore()
+    saved = IpHistory(store, dns_type)
+    for offset, ip in enumerate(ips):
+        saved.record(ip, timestamp=1_700_000_000 + offset)
+
+    loaded = IpHistory(FakeStore(store.data), dns_type)
+    asyncio.run(loaded.async_load())
+
+    assert loaded.last_ip == ips[-1]
+    assert loaded.statistics(10, now=1_700_000_100) == saved.statistics(
+        10, now=1_700_000_100
+    )
+
+
+def test_duplicate_ip_is_skipped() -> None:
+    """Recording the current address again is not a change."""
+    store = FakeStore()
+    ip_history = IpHistory(store, "a")
+
+    assert ip_history.record("192.0.2.1", timestamp=0)
+    store.data = None
+    assert not ip_history.record("192.0.2.1", timestamp=60)
+
+    assert store.data is None
+    assert ip_history.statistics(now=60)["changes"] == 0
+
+
+def test_ring_buffer_wraps() -> None:
+    """Only the last HISTORY_SIZE addresses are kept."""
+    ip_history = IpHistory(FakeStore(), "a")
+    for index in range(HISTORY_SIZE + 5):
+        ip_history.record(f"10.0.{index // 256}.{index % 256}", timestamp=index)
+
+    stats = ip_history.statistics(HISTORY_SIZE, now=HISTORY_SIZE + 5)
+
+    assert stats["changes"] == HISTORY_SIZE - 1
+    assert len(stats["last_changes"]) == HISTORY_SIZE - 1
+    assert stats["last_changes"][0]["ip"] == f"10.0.0.{HISTORY_SIZE + 4}"
+    assert stats["last_changes"][-1]["ip"] == "10.0.0.6"
+
+
+def test_statistics_include_current_stable_period() -> None:
+    """A long stable period after a burst of changes lowers the rate."""
+    ip_history = IpHistory(FakeStore(), "a")
+    ip_history.record("192.0.2.1", timestamp=0)
+    ip_history.record("192.0.2.2", timestamp=60)
+    ip_history.record("192.0.2.3", timestamp=120)
+
+    stats = ip_history.statistics(10, now=180 * DAY)
+
+    assert stats["changes"] == 2
+    assert stats["changes_per_day"] == pytest.approx(2 / 180)
+    assert stats["mean_stable_duration"] == pytest.approx(60 * DAY)
+    assert stats["observed_since"] == "1970-01-01T00:00:00+00:00"
+    assert [change["ip"] for change in stats["last_changes"]] == [
+        "192.0.2.3",
+        "192.0.2.2",
+    ]
+
+
+def test_empty_statistics() -> None:
+    """Without entries there are no rates."""
+    stats = IpHistory(FakeStore(), "a").statistics(10, now=0)
+
+    assert stats == {
+        "changes": 0,
+        "observed_since": None,
+        "mean_stable_duration": None,
+        "changes_per_day": None,
+        "last_changes": [],
+    }
+
+
+def test_remove_entry_removes_sensor_history(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The store removed with the entry is the one the sensor writes."""
+    stores: dict[str, FakeStore] = {}
+
+    def _history_store(hass, key: str) -> FakeStore:
+        return stores.setdefault(key, FakeStore())
+
+    monkeypatch.setattr(history, "history_store", _history_store)
+    entry = SimpleNamespace(
+        unique_id="unrelated",
+        data={CONF_DOMAIN_RR: "home", CONF_DOMAIN_NAME: "example.com", DNS_TYPE: "a"},
+    )
+
+    asyncio.run(async_remove_entry(None, entry))
+
+    assert list(stores) == [history_key("home", "example.com", "a")]
+    assert stores["home.example.com_a"].removed
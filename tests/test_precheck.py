@@ -0,0 +1,71 @@
+"""Tests for the authoritative precheck."""
+
+import asyncio
+
+import aiodns
+import pytest
+
+from custom_components.ddns.core import record_host
+from custom_components.ddns.precheck import AuthoritativePrecheck
+
+from .common import async_start_udp
+
+
+@pytest.mark.parametrize(
+    ("rr", "host"),
+    [
+        ("@", "example.com"),
+        ("home", "home.example.com"),
+        ("*", "ddns-precheck.example.com"),
+        ("*.sub", "ddns-precheck.sub.example.com"),
+    ],
+)
+def test_record_host(rr: str, host: str) -> None:
+    """Apex and wildcard notations map to a name that can be queried."""
+    assert record_host(rr, "example.com") == host
+
+
+def _is_current(dns_type: str, ip: str, port: int | None = None) -> tuple:
+    """Run the precheck against a stand-in answering 192.0.2.1.
+
+    Return the result and whether the nameserver resolver was kept.
+    """
+
+    async def run() -> tuple:
+        udp, stand_in_port = await async_start_udp("192.0.2.1")
+        precheck = AuthoritativePrecheck("example.com", "home.example.com", dns_type)
+        resolver = aiodns.DNSResolver(
+            nameservers=["127.0.0.1"],
+            udp_port=port or stand_in_port,
+            tcp_port=port or stand_in_port,
+            timeout=0.5,
+            tries=1,
+        )
+        precheck._resolver = resolver
+        try:
+            return await precheck.async_is_current(ip), precheck._resolver is resolver
+        finally:
+            await precheck.async_close()
+            udp.close()
+
+    return asyncio.run(run())
+
+
+def test_served_address_is_current() -> None:
+    """The served address matching the discovered one skips the sync."""
+    assert _is_current("a", "192.0.2.1") == (True, True)
+
+
+def test_other_address_is_not_current() -> None:
+    """A different served address needs a sync."""
+    assert _is_current("a", "192.0.2.2") == (False, True)
+
+
+def test_missing_record_keeps_nameservers() -> None:
+    """ENODATA is about the record, the nameserver cache is kept."""
+    assert _is_current("aaaa", "2001:db8::1") == (False, True)
+
+
+def test_unreachable_nameservers_are_dropped() -> None:
+    """A transport error looks the nameservers up again next time."""
+    assert _is_current("a", "192.0.2.1", port=1) == (False, False)
@@ -0,0 +1,162 @@
+"""Tests for the reconcile planner."""
+
+import pytest
+
+from custom_components.ddns.core import TemplateRecord, parse_template
+from custom_components.ddns.reconcile import (
+    ACTION_CREATE,
+    ACTION_DELETE,
+    ACTION_UPDATE,
+    ActualRecord,
+    DesiredRecord,
+    plan,
+)
+
+
+def test_extra_address_records_are_kept() -> None:
+    """Without a previous value one record is repointed, none deleted."""
+    desired = DesiredRecord("home", "A", ("192.0.2.3",))
+    actual = [
+        ActualRecord("1", "home", "A", "192.0.2.1"),
+        ActualRecord("2", "home", "A", "192.0.2.2"),
+    ]
+
+    ops = plan(desired, actual)
+
+    assert [(op.action, op.value) for op in ops] == [(ACTION_UPDATE, "192.0.2.3")]
+
+
+def test_previously_synced_record_is_repointed() -> None:
+    """The record that served the last synced address is reused first."""
+    desired = DesiredRecord("home", "A", ("192.0.2.3",), previous=("192.0.2.2",))
+    actual = [
+        ActualRecord("1", "home", "A", "192.0.2.1"),
+        ActualRecord("2", "home", "A", "192.0.2.2"),
+    ]
+
+    ops = plan(desired, actual)
+
+    assert [(op.action, op.record_id, op.value) for op in ops] == [
+        (ACTION_UPDATE, "2", "192.0.2.3")
+    ]
+
+
+def test_current_address_is_a_noop() -> None:
+    """An address already served produces no ops, extras included."""
+    desired = DesiredRecord("home", "A", ("192.0.2.2",))
+    actual = [
+        ActualRecord("1", "home", "A", "192.0.2.1"),
+        ActualRecord("2", "home", "A", "192.0.2.2"),
+    ]
+
+    assert plan(desired, actual) == []
+
+
+def test_prune_deletes_extra_records() -> None:
+    """With prune, leftovers beyond the desired values are deleted."""
+    desired = DesiredRecord("home", "A", ("192.0.2.2",), prune=True)
+    actual = [
+        ActualRecord("1", "home", "A", "192.0.2.1"),
+        ActualRecord("2", "home", "A", "192.0.2.2"),
+    ]
+
+    ops = plan(desired, actual)
+
+    assert [(op.action, op.record_id) for op in ops] == [(ACTION_DELETE, "1")]
+
+
+def test_missing_record_is_created() -> None:
+    """A rr without records gets one created."""
+    desired = DesiredRecord("home", "A", ("192.0.2.1",))
+
+    ops = plan(desired, [])
+
+    assert [(op.action, op.value) for op in ops] == [(ACTION_CREATE, "192.0.2.1")]
+
+
+SPF = TemplateRecord("@", "TXT", "v=spf1 ip4:{ip} -all")
+
+
+@pytest.mark.parametrize(
+    ("template", "value"),
+    [
+        (SPF, "google-site-verification=abc"),
+        (SPF, "v=spf1 include:_spf.example.com ~all"),
+        (TemplateRecord("@", "TXT", "ip={ip}"), "ip=secret-token"),
+        (TemplateRecord("@", "TXT", "ip={ip}"), "ip=2001:db8::1"),
+        (TemplateRecord("@", "TXT", "ip6={ip}"), "ip6=cafe"),
+    ],
+)
+def test_template_leaves_other_records_alone(
+    template: TemplateRecord, value: str
+) -> None:
+    """Records not published from the template are never changed."""
+    ip = "2001:db8::2" if "ip6" in template.template else "192.0.2.1"
+    desired = template.render(ip)
+    actual = [ActualRecord("1", "@", "TXT", value)]
+
+    ops = plan(desired, actual)
+
+    assert [(op.action, op.record_id) for op in ops] == [(ACTION_CREATE, None)]
+
+
+def test_template_replaces_its_record() -> None:
+    """A new address updates the record rendered for the old one."""
+    desired = SPF.render("192.0.2.2")
+    actual = [
+        ActualRecord("1", "@", "TXT", "google-site-verification=abc"),
+        ActualRecord("2", "@", "TXT", "v=spf1 ip4:192.0.2.1 -all"),
+    ]
+
+    ops = plan(desired, actual)
+
+    assert [(op.action, op.record_id, op.value) for op in ops] == [
+        (ACTION_UPDATE, "2", "v=spf1 ip4:192.0.2.2 -all")
+    ]
+
+
+def test_changed_template_replaces_earlier_record() -> None:
+    """Editing the template updates the old record instead of adding one."""
+    desired = TemplateRecord("@", "TXT", "v=spf1 ip4:{ip} ~all").render("192.0.2.1")
+    actual = [
+        ActualRecord("1", "@", "TXT", "google-site-verification=abc"),
+        ActualRecord("2", "@", "TXT", "v=spf1 ip4:192.0.2.1 -all"),
+    ]
+
+    ops = plan(desired, actual)
+
+    assert [(op.action, op.record_id, op.value) for op in ops] == [
+        (ACTION_UPDATE, "2", "v=spf1 ip4:192.0.2.1 ~all")
+    ]
+
+
+@pytest.mark.parametrize(
+    ("line", "ip"),
+    [
+        ("@ TXT v=spf1 ip4:{ip} -all", "192.0.2.1"),
+        ("x CNAME host-{ip}.example.com", "192.0.2.1"),
+        ("x CNAME host-{ip}.example.com", "2001:db8::1"),
+        ("@ TXT {ip}", "2001:db8::1"),
+    ],
+)
+def test_template_recognises_its_own_record(line: str, ip: str) -> None:
+    """A published template value is left as it is on the next cycle."""
+    desired = parse_template(line).render(ip)
+    actual = [ActualRecord("1", desired.rr, desired.type, desired.values[0])]
+
+    assert plan(desired, actual) == []
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "@ TXT hello",
+        "@ TXT ip{ip}",
+        "@ TXT",
+        "@ 1 {ip}",
+    ],
+)
+def test_parse_template_rejects(line: str) -> None:
+    """Templates that could never recognise their record are refused."""
+    with pytest.raises(ValueError):
+        parse_template(line)
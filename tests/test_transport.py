@@ -0,0 +1,222 @@
+"""Tests for the DNS-over-TLS transport against local stand-ins."""
+
+import asyncio
+from pathlib import Path
+import shutil
+import ssl
+import struct
+import subprocess
+
+import aiodns
+from aiodns.error import ARES_ECONNREFUSED, ARES_ETIMEOUT, DNSError
+import pytest
+
+from custom_components.ddns.transport import DotChannel, FallbackResolver
+
+from .common import TcpStandIn, async_start_udp
+
+HOST = "myip.opendns.com"
+TLS_HOSTNAME = "dns.test"
+
+
+async def _async_start_tcp(
+    stand_in: TcpStandIn,
+    server_ssl: ssl.SSLContext | None = None,
+    client_ssl: ssl.SSLContext | bool = False,
+    server_hostname: str | None = None,
+) -> tuple[asyncio.Server, DotChannel]:
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0, ssl=server_ssl)
+    port = server.sockets[0].getsockname()[1]
+    channel = DotChannel(
+        "127.0.0.1",
+        port,
+        server_hostname=server_hostname,
+        ssl_context=client_ssl,
+        timeout=0.5,
+    )
+    return server, channel
+
+
+@pytest.fixture(name="certificate")
+def certificate_fixture(tmp_path: Path) -> tuple[Path, Path]:
+    """Return a self-signed certificate for TLS_HOSTNAME and its key."""
+    openssl = shutil.which("openssl")
+    if openssl is None:
+        pytest.skip("openssl is not installed")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        [
+            openssl,
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            f"/CN={TLS_HOSTNAME}",
+            "-addext",
+            f"subjectAltName=DNS:{TLS_HOSTNAME}",
+            "-keyout",
+            str(key),
+            "-out",
+            str(cert),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def _server_context(certificate: tuple[Path, Path]) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    return context
+
+
+def _run_tls(
+    certificate: tuple[Path, Path],
+    stand_in: TcpStandIn,
+    client_ssl: ssl.SSLContext | bool,
+    server_hostname: str,
+    queries: int = 1,
+) -> list:
+    """Resolve HOST queries times over TLS to stand_in."""
+
+    async def run() -> list:
+        server, channel = await _async_start_tcp(
+            stand_in, _server_context(certificate), client_ssl, server_hostname
+        )
+        try:
+            return await asyncio.gather(
+                *(channel.query(HOST, "A") for _ in range(queries))
+            )
+        finally:
+            channel.cancel()
+            server.close()
+
+    return asyncio.run(run())
+
+
+def test_tls_queries_share_one_connection(certificate: tuple[Path, Path]) -> None:
+    """Queries over a verified TLS connection share one handshake."""
+    stand_in = TcpStandIn("192.0.2.1", delay=0.05)
+    client_ssl = ssl.create_default_context(cafile=certificate[0])
+
+    results = _run_tls(certificate, stand_in, client_ssl, TLS_HOSTNAME, queries=10)
+
+    assert [answers[0].host for answers in results] == ["192.0.2.1"] * 10
+    assert stand_in.connections == 1
+
+
+@pytest.mark.parametrize(
+    ("trusted", "server_hostname"),
+    [(False, TLS_HOSTNAME), (True, "other.test")],
+)
+def test_tls_verifies_the_server(
+    certificate: tuple[Path, Path], trusted: bool, server_hostname: str
+) -> None:
+    """An untrusted certificate or another hostname is refused."""
+    # Without a CA file the default context is built off the event loop.
+    client_ssl = ssl.create_default_context(cafile=certificate[0]) if trusted else True
+
+    with pytest.raises(DNSError) as err:
+        _run_tls(certificate, TcpStandIn("192.0.2.1"), client_ssl, server_hostname)
+
+    assert err.value.args[0] == ARES_ECONNREFUSED
+
+
+def test_queries_ask_for_keepalive() -> None:
+    """Every query carries an empty edns-tcp-keepalive option."""
+    stand_in = TcpStandIn("192.0.2.1")
+
+    async def run() -> None:
+        server, channel = await _async_start_tcp(stand_in)
+        try:
+            await channel.query(HOST, "A")
+        finally:
+            channel.cancel()
+            server.close()
+
+    asyncio.run(run())
+
+    (query,) = stand_in.queries
+    assert struct.unpack_from(">H", query, 10) == (1,)
+    opt = b"\x00" + struct.pack(">HHIH", 41, 1232, 0, 4)
+    assert query[-15:] == opt + struct.pack(">HH", 11, 0)
+
+
+def test_queries_share_one_connection() -> None:
+    """Concurrent queries are multiplexed over a single connection."""
+    stand_in = TcpStandIn("192.0.2.1", delay=0.05)
+
+    async def run() -> list:
+        server, channel = await _async_start_tcp(stand_in)
+        try:
+            return await asyncio.gather(*(channel.query(HOST, "A") for _ in range(10)))
+        finally:
+            channel.cancel()
+            server.close()
+
+    results = asyncio.run(run())
+
+    assert [answers[0].host for answers in results] == ["192.0.2.1"] * 10
+    assert stand_in.connections == 1
+
+
+def test_stalled_channel_times_out() -> None:
+    """A resolver that never answers fails the query with a timeout."""
+    stand_in = TcpStandIn("192.0.2.1", delay=10)
+
+    async def run() -> None:
+        server, channel = await _async_start_tcp(stand_in)
+        try:
+            await channel.query(HOST, "A")
+        finally:
+            channel.cancel()
+            server.close()
+
+    with pytest.raises(DNSError) as err:
+        asyncio.run(run())
+
+    assert err.value.args[0] == ARES_ETIMEOUT
+
+
+def test_timeout_falls_back_to_udp() -> None:
+    """After a timeout the UDP resolver answers and the channel is skipped."""
+    stand_in = TcpStandIn("192.0.2.1", delay=10)
+
+    async def run() -> list[str]:
+        server, channel = await _async_start_tcp(stand_in)
+        udp, port = await async_start_udp("192.0.2.2")
+        resolver = FallbackResolver(
+            channel,
+            aiodns.DNSResolver(nameservers=["127.0.0.1"], tcp_port=port, udp_port=port),
+        )
+        try:
+            return [(await resolver.query(HOST, "A"))[0].host for _ in range(3)]
+        finally:
+            channel.cancel()
+            udp.close()
+            server.close()
+
+    assert asyncio.run(run()) == ["192.0.2.2"] * 3
+    assert stand_in.connections == 1
+
+
+def test_refused_channel_falls_back_to_udp() -> None:
+    """A resolver that refuses the connection falls back to UDP."""
+
+    async def run() -> str:
+        udp, port = await async_start_udp("192.0.2.2")
+        resolver = FallbackResolver(
+            DotChannel("127.0.0.1", 1, ssl_context=False, timeout=0.5),
+            aiodns.DNSResolver(nameservers=["127.0.0.1"], tcp_port=port, udp_port=port),
+        )
+        try:
+            return (await resolver.query(HOST, "A"))[0].host
+        finally:
+            udp.close()
+
+    assert asyncio.run(run()) == "192.0.2.2"